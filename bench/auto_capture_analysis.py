@@ -0,0 +1,108 @@
+"""
+Per-frame cost of the auto-capture stability analysis.
+
+Compares the original analysis path (decode, resize, window and corrcoef
+every prior frame for every new frame) against the current
+AutoCaptureManager.process_frame path.
+
+Usage:
+    python -m bench.auto_capture_analysis [frame.jpg ...]
+
+Without arguments a synthetic 960x640 EVF-like sequence is generated.
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.auto_capture import AutoCaptureManager
+from src.evf_frame import EvfFrame
+
+
+def synthetic_frames(count: int = 60, width: int = 960, height: int = 640):
+    """Smooth, EVF-sized JPEGs with a little frame-to-frame sensor noise."""
+    rng = np.random.default_rng(0)
+    base = rng.random((height // 16, width // 16, 3)) * 255
+    frames = []
+    for _ in range(count):
+        noisy = np.clip(base + rng.normal(0, 1, base.shape), 0, 255).astype(np.uint8)
+        img = cv2.resize(noisy, (width, height), interpolation=cv2.INTER_CUBIC)
+        frames.append(
+            cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+        )
+    return frames
+
+
+def legacy_similarity(frame_data1: bytes, frame_data2: bytes) -> float:
+    def to_array(frame_data: bytes) -> np.ndarray:
+        frame = cv2.imdecode(np.frombuffer(frame_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+        return cv2.resize(frame, (64, 64))
+
+    img1 = to_array(frame_data1)
+    img2 = to_array(frame_data2)
+    hanning_window = (
+        np.hanning(img1.shape[0])[:, np.newaxis]
+        * np.hanning(img1.shape[1])[np.newaxis, :]
+    )
+    correlation = np.corrcoef(
+        (img1 * hanning_window).flatten(), (img2 * hanning_window).flatten()
+    )[0, 1]
+    return max(0.0, correlation)
+
+
+def bench_legacy(frames: list[bytes], history: int = 12) -> float:
+    priors: list[bytes] = []
+    start = time.perf_counter()
+    for data in frames:
+        [legacy_similarity(data, prior) for prior in priors]
+        priors.append(data)
+        if len(priors) > history:
+            priors.pop(0)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def bench_current(frames: list[bytes]) -> float:
+    manager = AutoCaptureManager()
+    start = time.perf_counter()
+    for data in frames:
+        manager.process_frame(EvfFrame(data))
+    return (time.perf_counter() - start) / len(frames)
+
+
+def bench_current_decoded(frames: list[bytes]) -> float:
+    """
+    Analysis cost once the display stage has already decoded the frame. The
+    thumbnail is still decoded on its own, so this should match `current`.
+    """
+    manager = AutoCaptureManager()
+    decoded = [EvfFrame(data) for data in frames]
+    for frame in decoded:
+        _ = frame.rgb
+
+    start = time.perf_counter()
+    for frame in decoded:
+        manager.process_frame(frame)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main(paths: list[str]):
+    if paths:
+        frames = [open(path, "rb").read() for path in paths]
+    else:
+        frames = synthetic_frames()
+
+    legacy = bench_legacy(frames)
+    current = bench_current(frames)
+    decoded = bench_current_decoded(frames)
+
+    print(f"frames analysed: {len(frames)}")
+    print(f"legacy  : {legacy * 1000:8.3f} ms/frame")
+    print(f"current : {current * 1000:8.3f} ms/frame")
+    print(f"speedup : {legacy / current:8.1f}x")
+    print(f"current, frame already decoded: {decoded * 1000:8.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+"""
+Shutter-to-transfer latency with live view running, with and without
+pausing live view during captures.
+
+Usage:
+    python -m bench.capture_preemption [SHOTS]
+
+Runs against the fake EDSDK (see src/camera_core/fake_sdk.py), configured
+with $SLIDESCANNER_FAKE_EDSDK when set. A live view loop pulls EVF frames
+at full rate like LiveView does, while shots are taken one after another.
+Reported per run: the time from the shutter being pressed until the camera
+hands the image over, and until it is downloaded, in ms.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from threading import Event, Thread
+
+os.environ.setdefault(
+    "SLIDESCANNER_FAKE_EDSDK",
+    "evf_latency=0.03,focus_latency=0.1,capture_size=3000x2000",
+)
+# Keep the images (and the settings) away from the real home directory
+os.environ["HOME"] = tempfile.mkdtemp(prefix="capture_preemption_")
+
+import numpy as np
+from gi.repository import GObject
+
+from src.camera import Camera
+from src.camera_core import EdsPropertyIDEnum, download, edsdk
+from src.camera_core.err import CameraException
+from src.camera_core.event_pump import event_pump
+from src.camera_core.manager import CameraManager
+from src.common_signal import SignalName, signal_definitions
+from src.frame_pacing import CaptureThrottle, FramePacer, is_evf_not_ready
+from src.picture import CassetteItem
+
+
+class Signals(GObject.GObject):
+    __gsignals__ = signal_definitions()
+
+    cassette = CassetteItem()
+
+
+def live_view(camera: Camera, pacer: FramePacer, running: Event):
+    """The acquisition part of LiveView.live_view_loop."""
+    while running.is_set():
+        pacer.begin_frame()
+        try:
+            camera.download_evf_image()
+            pacer.frame_done()
+        except CameraException as e:
+            if not is_evf_not_ready(e):
+                raise
+            pacer.not_ready()
+
+        pacer.wait()
+
+
+def take_shots(signals: Signals, camera: Camera, count: int) -> dict[str, list]:
+    marks: dict[str, float] = {}
+    for name in ("ShutterDown", "ImageDownloading", "ImageDownloaded"):
+        signals.connect(
+            name, lambda *_, name=name: marks.setdefault(name, time.monotonic())
+        )
+
+    transfer, downloaded = [], []
+    for shot in range(count):
+        marks.clear()
+        signals.cassette.label = f"slide {shot}"
+        signals.emit(SignalName.TakePicture.name)
+
+        # Let the sequence start, then wait for it and the download
+        time.sleep(0.01)
+        with camera.picture_lock:
+            pass
+        download.wait_for_downloads(30)
+
+        transfer.append((marks["ImageDownloading"] - marks["ShutterDown"]) * 1000)
+        downloaded.append((marks["ImageDownloaded"] - marks["ShutterDown"]) * 1000)
+
+        # Give live view time to get back up to speed
+        time.sleep(0.5)
+
+    return {"transfer": transfer, "downloaded": downloaded}
+
+
+def report(label: str, results: dict[str, list], frames: int):
+    columns = " ".join(
+        f"{stage} p50 {np.percentile(ms, 50):6.1f} p90 {np.percentile(ms, 90):6.1f}"
+        for stage, ms in results.items()
+    )
+    print(f"{label:<22} {columns}  ({frames} EVF frames)")
+
+
+def main(args: list[str]):
+    count = int(args[0]) if args else 10
+    print(f"fake camera: {os.environ['SLIDESCANNER_FAKE_EDSDK']}, {count} shots")
+
+    signals = Signals()
+    signals.cassette.name = "Bench"
+
+    manager = CameraManager(signals)
+    manager.initialize()
+    manager.get_camera_list()
+    camera = Camera(manager, manager.get_camera(0))
+
+    event_pump.start(
+        camera=lambda: camera.ref,
+        busy=lambda: camera.picture_lock.locked() or download.pending_downloads() > 0,
+    )
+    camera.open()
+    camera.set_property_value(EdsPropertyIDEnum.Evf_OutputDevice, 2)
+    camera.set_property_value(EdsPropertyIDEnum.Evf_Mode, 1)
+
+    try:
+        for label, throttled in (
+            ("live view running", False),
+            ("paused for capture", True),
+        ):
+            pacer = FramePacer(target_fps=30)
+            if throttled:
+                CaptureThrottle(pacer).attach(signals)
+
+            running = Event()
+            running.set()
+            loop = Thread(target=live_view, args=(camera, pacer, running), daemon=True)
+
+            frames = edsdk.stats["evf_frames"]
+            loop.start()
+            time.sleep(0.5)
+            results = take_shots(signals, camera, count)
+            running.clear()
+            pacer.unthrottle()
+            loop.join()
+
+            report(label, results, edsdk.stats["evf_frames"] - frames)
+    finally:
+        download.metadata_writer.join(10)
+        event_pump.stop(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+"""
+Per-file cost of CR3 tagging: a fresh exiftool per file against one
+persistent `-stay_open` process.
+
+Usage:
+    python -m bench.exiftool_overhead [FILES]
+
+Uses $SLIDESCANNER_EXIFTOOL when set (e.g. plain `exiftool`), otherwise the
+stand-in in bench/fake_exiftool.py. The files are placeholders, so with real
+exiftool the tagging itself fails and only the process overhead is compared.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from src import exif_utils
+from src.exiftool import EXIFTOOL_ENV_VAR, ExifTool
+from src.picture import CaptureContext
+
+
+def tag_all(paths: list[str]) -> float:
+    context = CaptureContext(
+        name="Bench", label="A slide", date=datetime(1994, 1, 1), rating=3
+    )
+
+    start = time.perf_counter()
+    for path in paths:
+        exif_utils.tag_raw_file(path, context, 0xB108)
+    return (time.perf_counter() - start) / len(paths) * 1000
+
+
+def main(args: list[str]):
+    count = int(args[0]) if args else 20
+    os.environ.setdefault(
+        EXIFTOOL_ENV_VAR,
+        f"{sys.executable} {os.path.join(os.path.dirname(__file__), 'fake_exiftool.py')}",
+    )
+    print(f"exiftool: {os.environ[EXIFTOOL_ENV_VAR]}, {count} files")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(count):
+            path = os.path.join(directory, f"IMG_{index:04d}.CR3")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1024)
+            paths.append(path)
+
+        exif_utils.set_exiftool(None)
+        print(f"{'process per file':<20} {tag_all(paths):8.1f} ms/file")
+
+        tool = ExifTool()
+        tool.start()
+        exif_utils.set_exiftool(tool)
+        try:
+            # The first command still waits for start-up, like the app's warm up
+            tool.ping()
+            print(f"{'stay_open':<20} {tag_all(paths):8.1f} ms/file")
+        finally:
+            exif_utils.set_exiftool(None)
+            tool.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
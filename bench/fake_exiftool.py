@@ -0,0 +1,89 @@
+"""
+A stand-in for exiftool, for tests and benchmarks on machines without it.
+
+It understands the small part of exiftool this project uses:
+
+  - `-ver`
+  - `-TAG=VALUE ... FILE`, which records the tags in FILE.tags.json and
+    reports `1 image files updated`
+  - `-stay_open True -@ -`, reading commands from stdin terminated by
+    `-execute[N]` and answering each with `{ready[N]}`
+
+Real exiftool spends a few hundred milliseconds starting Perl and loading its
+modules, simulated with FAKE_EXIFTOOL_STARTUP (seconds, default 0.3).
+FAKE_EXIFTOOL_WRITE adds a per-file cost (default 0.01).
+
+Usage:
+    SLIDESCANNER_EXIFTOOL="python bench/fake_exiftool.py" python main.py
+"""
+
+import json
+import os
+import sys
+import time
+
+VERSION = "13.00"
+
+
+def run(args: list[str]) -> tuple[str, bool]:
+    """Run one command, return its output and whether it succeeded."""
+    if args == ["-ver"]:
+        return f"{VERSION}\n", True
+
+    tags: dict[str, str] = {}
+    files: list[str] = []
+    for arg in args:
+        if arg.startswith("-"):
+            name, sep, value = arg[1:].partition("=")
+            if sep:
+                tags[name] = value
+        else:
+            files.append(arg)
+
+    updated = 0
+    output = ""
+    for path in files:
+        if not os.path.isfile(path):
+            output += f"Error: File not found - {path}\n"
+            continue
+
+        time.sleep(float(os.environ.get("FAKE_EXIFTOOL_WRITE", "0.01")))
+        with open(f"{path}.tags.json", "w") as f:
+            json.dump(tags, f)
+        updated += 1
+
+    output += f"    {updated} image files updated\n"
+    return output, updated > 0
+
+
+def stay_open():
+    args: list[str] = []
+
+    for line in sys.stdin:
+        arg = line.rstrip("\n")
+
+        if arg.startswith("-execute"):
+            output, _ = run(args)
+            sys.stdout.write(output + f"{{ready{arg[len('-execute'):]}}}\n")
+            sys.stdout.flush()
+            args = []
+        elif args[-1:] == ["-stay_open"] and arg.lower() == "false":
+            return
+        else:
+            args.append(arg)
+
+
+def main(argv: list[str]):
+    time.sleep(float(os.environ.get("FAKE_EXIFTOOL_STARTUP", "0.3")))
+
+    if argv[:4] == ["-stay_open", "True", "-@", "-"]:
+        stay_open()
+        return 0
+
+    output, ok = run(argv)
+    sys.stdout.write(output)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,206 @@
+"""
+Compare the auto-capture stability detectors on a replayed EVF sequence.
+
+For every detector the sequence is fed through AutoCaptureManager exactly as
+live view would, and we report:
+
+  - CPU time per frame (feature extraction and comparison, decode excluded)
+  - decision latency: time from a slide settling to the capture trigger
+  - false triggers: triggers while no slide was settled, or repeat triggers
+    on a slide that was already captured
+  - missed slides: settled slides that never triggered
+
+Usage:
+    python -m bench.stability_detectors [SEQUENCE_DIR | RECORDING.evfrec]
+
+SEQUENCE_DIR holds the frames as *.jpg (replayed in name order) and a
+sequence.json describing them:
+
+    {"fps": 30, "settled": [[first_frame, last_frame], ...]}
+
+A live view recording (see src/evf_recording.py) is described the same way
+by a RECORDING.json next to it, the frame rate defaults to the recorded one.
+
+Without a directory a synthetic slide feeder sequence is generated.
+"""
+
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.auto_capture import AutoCaptureManager
+from src.evf_frame import EvfFrame
+from src.evf_recording import EvfRecording
+from src.stability_detectors import DETECTORS
+
+
+@dataclass
+class Sequence:
+    frames: list[bytes]
+    fps: float
+    settled: list[tuple[int, int]]
+
+
+@dataclass
+class Result:
+    detector: str
+    cpu_ms_per_frame: float
+    latencies_ms: list[float]
+    false_triggers: int
+    missed: int
+    triggers: int
+
+
+def synthetic_sequence(
+    slides: int = 8,
+    feed_frames: int = 10,
+    settled_frames: int = 30,
+    width: int = 960,
+    height: int = 640,
+    fps: float = 30,
+) -> Sequence:
+    """Slides sliding in from the right, then sitting still with sensor noise."""
+    rng = np.random.default_rng(1)
+    frames: list[bytes] = []
+    settled: list[tuple[int, int]] = []
+
+    def encode(img: np.ndarray) -> bytes:
+        return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+    def noisy(img: np.ndarray) -> np.ndarray:
+        noise = rng.normal(0, 2, img.shape)
+        return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+    previous = np.zeros((height, width, 3), np.float32)
+    for _ in range(slides):
+        low_res = rng.random((height // 16, width // 16, 3)) * 255
+        slide = cv2.resize(
+            low_res, (width, height), interpolation=cv2.INTER_CUBIC
+        ).astype(np.float32)
+
+        # The new slide pushes the old one out to the left
+        for step in range(1, feed_frames + 1):
+            offset = int(width * step / feed_frames)
+            img = np.concatenate([previous[:, offset:], slide[:, :offset]], axis=1)
+            img = cv2.blur(img, (15, 1))
+            frames.append(encode(noisy(img)))
+
+        start = len(frames)
+        for _ in range(settled_frames):
+            frames.append(encode(noisy(slide)))
+        settled.append((start, len(frames) - 1))
+
+        previous = slide
+
+    return Sequence(frames, fps, settled)
+
+
+def load_sequence(directory: Path) -> Sequence:
+    meta = json.loads((directory / "sequence.json").read_text())
+    frames = [path.read_bytes() for path in sorted(directory.glob("*.jpg"))]
+    settled = [(int(start), int(end)) for start, end in meta["settled"]]
+    return Sequence(frames, float(meta.get("fps", 30)), settled)
+
+
+def load_recording(path: Path) -> Sequence:
+    recording = EvfRecording(str(path))
+    try:
+        records = list(recording.frames())
+        frames = [bytes(record.payload) for record in records]
+        timestamps = [record.timestamp_ns for record in records]
+        del records
+    finally:
+        recording.close()
+
+    recorded_fps = 30.0
+    if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+        recorded_fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0]) * 1e9
+
+    sidecar = path.with_suffix(".json")
+    meta = json.loads(sidecar.read_text()) if sidecar.exists() else {}
+    settled = [(int(start), int(end)) for start, end in meta.get("settled", [])]
+    return Sequence(frames, float(meta.get("fps", recorded_fps)), settled)
+
+
+def run_detector(name: str, sequence: Sequence) -> Result:
+    manager = AutoCaptureManager(detector=DETECTORS[name]())
+
+    # Decode up front, every detector works from the same thumbnail and its
+    # decode is not the detector's cost
+    frames = [EvfFrame(data) for data in sequence.frames]
+    for frame in frames:
+        _ = frame.thumbnail
+
+    triggers: list[int] = []
+    cpu = 0.0
+    for index, frame in enumerate(frames):
+        start = time.process_time()
+        if manager.process_frame(frame):
+            triggers.append(index)
+        cpu += time.process_time() - start
+
+    latencies: list[float] = []
+    false_triggers = 0
+    captured: set[int] = set()
+    for index in triggers:
+        slide = next(
+            (
+                i
+                for i, (first, last) in enumerate(sequence.settled)
+                if first <= index <= last
+            ),
+            None,
+        )
+        if slide is None or slide in captured:
+            false_triggers += 1
+            continue
+
+        captured.add(slide)
+        latencies.append((index - sequence.settled[slide][0]) / sequence.fps * 1000)
+
+    return Result(
+        detector=name,
+        cpu_ms_per_frame=cpu / len(frames) * 1000,
+        latencies_ms=latencies,
+        false_triggers=false_triggers,
+        missed=len(sequence.settled) - len(captured),
+        triggers=len(triggers),
+    )
+
+
+def main(args: list[str]):
+    if not args:
+        sequence = synthetic_sequence()
+    elif args[0].endswith(".evfrec"):
+        sequence = load_recording(Path(args[0]))
+    else:
+        sequence = load_sequence(Path(args[0]))
+
+    print(
+        f"{len(sequence.frames)} frames, {len(sequence.settled)} slides "
+        f"@ {sequence.fps:g} fps"
+    )
+    print(
+        f"{'detector':<20} {'cpu ms/frame':>12} {'latency ms':>11} "
+        f"{'false trig':>10} {'missed':>7}"
+    )
+
+    for name in DETECTORS:
+        result = run_detector(name, sequence)
+        latency = (
+            f"{np.median(result.latencies_ms):11.0f}" if result.latencies_ms else "-"
+        )
+        false_rate = result.false_triggers / max(result.triggers, 1)
+        print(
+            f"{result.detector:<20} {result.cpu_ms_per_frame:12.3f} {latency:>11} "
+            f"{result.false_triggers:4d} ({false_rate:4.0%}) {result.missed:7d}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,4 +1,3 @@
-import ctypes
 import logging
 import threading
 import time
@@ -14,10 +13,17 @@ gi.require_version("Gdk", "4.0")
 
 from gi.repository import Gio, Gtk
 
-from .camera_core import EdsUInt32, edsdk
+from .camera_core import download
+from .camera_core.event_pump import event_pump
+from .camera_core.executor import sdk_executor
+from .exif_utils import set_exiftool
+from .exiftool import ExifTool
 from .shared_state import SharedState
 from .slide_scanner_window import SlideScannerWindow
 
+# How often to look for a newly connected camera
+CAMERA_WATCH_INTERVAL = 0.25
+
 
 class SlideScannerApplication(Gtk.Application):
     def __init__(self):
@@ -32,6 +38,18 @@ class SlideScannerApplication(Gtk.Application):
         self.state = SharedState()
         self.camera_watcher = None
 
+        # One exiftool process for the whole session, rather than one per image
+        self.exiftool = ExifTool()
+        set_exiftool(self.exiftool)
+
+    def capture_in_flight(self) -> bool:
+        """Whether a shot is being taken or still downloading."""
+        camera = self.state.camera
+        if camera is not None and camera.picture_lock.locked():
+            return True
+
+        return download.pending_downloads() > 0
+
     def do_activate(self):
         # Initialize camera manager
         camera_status = "Initializing EDSDK..."
@@ -52,22 +70,20 @@ class SlideScannerApplication(Gtk.Application):
                 log.info("We are initialized nicely")
                 time.sleep(0.4)
 
+            # Events are pumped on their own thread, this one only looks for
+            # a camera to connect to
+            event_pump.start(
+                camera=lambda: self.state.camera.ref if self.state.camera else None,
+                busy=self.capture_in_flight,
+            )
+
             try:
                 while (
                     self.state.camera_manager.initialized.is_set()
                     and self.running.is_set()
                 ):
-                    time.sleep(0.05)
+                    time.sleep(CAMERA_WATCH_INTERVAL)
                     if self.state.camera is not None:
-                        # We have a camera, process events and chill
-                        # Need to call EdsGetEvent regularly to process camera events
-
-                        if edsdk:
-                            event = EdsUInt32()
-                            edsdk.EdsGetEvent(
-                                self.state.camera.ref,
-                                ctypes.byref(event),
-                            )
                         continue
 
                     if not self.state.camera_manager.get_camera_count():
@@ -89,6 +105,12 @@ class SlideScannerApplication(Gtk.Application):
 
             log.info("Leaving camera watcher routine")
 
+        def warm_up_exiftool():
+            if not self.exiftool.ping():
+                log.warning("exiftool is not available, CR3 files get XMP sidecars")
+
+        Thread(target=warm_up_exiftool, daemon=True).start()
+
         win = SlideScannerWindow(self.state, application=self)
 
         self.camera_watcher = Thread(target=edsdk_subsystem, daemon=True)
@@ -101,8 +123,20 @@ class SlideScannerApplication(Gtk.Application):
         if self.camera_watcher is not None:
             self.camera_watcher.join(timeout=3)
 
+        # Let shots already taken reach the disk with their metadata
+        if not download.wait_for_downloads(timeout=10):
+            log.warning("Quitting with downloads still in flight")
+        # Only now, shots still waiting for their transfer need the events
+        event_pump.stop(timeout=1)
+        if not download.metadata_writer.join(timeout=10):
+            log.warning("Quitting with images still waiting for metadata")
+
+        set_exiftool(None)
+        self.exiftool.close()
+
         if self.state.camera:
             self.state.camera.close()
 
         self.state.camera_manager.terminate()
+        sdk_executor.shutdown(timeout=2)
         self.quit()
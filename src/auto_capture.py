@@ -1,7 +1,13 @@
 import contextlib
 from gi.repository import GObject
 import numpy as np
-import cv2
+
+from .evf_frame import EvfFrame
+from .ring_buffer import RingBuffer
+from .stability_detectors import CorrelationDetector, StabilityDetector
+
+# Number of analysed frames kept for the stability graph
+STABILITY_HISTORY_LENGTH = 50
 
 
 class AutoCaptureManager(GObject.GObject):
@@ -10,27 +16,52 @@ class AutoCaptureManager(GObject.GObject):
     _enabled: bool = False  # Auto capture toggle state
 
     stability_threshold: float
-    stability_duration: int
-    prior_frames: list = []
-    total_frames_processed = 0
-    _stability_history: list[list[float]] = []
-    last_captured_image: bytes | None = None
+    detector: StabilityDetector
+    prior_frames: RingBuffer
+    total_frames_processed: int
+    _stability_history: RingBuffer
+    last_captured_image: np.ndarray | None = None
     stability_duration: int = 12
 
     def __init__(
         self,
-        stability_threshold: float = 0.95,
+        stability_threshold: float | None = None,
+        detector: StabilityDetector | None = None,
     ):
         """
         Initialize auto-capture manager.
 
         Args:
-            window: The main window instance
-            stability_threshold: Correlation threshold (0-1) for considering images stable
-            stability_duration: Duration in seconds that image must remain stable
+            stability_threshold: Similarity threshold (0-1) for considering images
+                stable, defaults to the detector's own threshold
+            detector: How frames are compared, defaults to windowed correlation
         """
         super().__init__()
-        self.stability_threshold = stability_threshold
+        self.detector = detector or CorrelationDetector()
+        self.stability_threshold = (
+            self.detector.default_threshold
+            if stability_threshold is None
+            else stability_threshold
+        )
+        self.total_frames_processed = 0
+
+        # One row per analysed frame: its similarity to each prior frame
+        self._stability_history = RingBuffer(
+            STABILITY_HISTORY_LENGTH,
+            (self.stability_duration,),
+        )
+
+        # Detector features of the most recent frames
+        self.prior_frames = RingBuffer(
+            self.stability_duration,
+            self.detector.feature_shape,
+            self.detector.feature_dtype,
+        )
+
+        # Scratch space reused for every frame, so the analysis hot path does
+        # not allocate
+        self._similarities = np.empty(self.stability_duration, np.float32)
+        self._history_row = np.zeros(self.stability_duration, np.float32)
 
     @GObject.Property(type=bool, default=False)
     def enabled(self):
@@ -41,42 +72,43 @@ class AutoCaptureManager(GObject.GObject):
         self._enabled = val
 
     @GObject.Property(type=GObject.TYPE_PYOBJECT)
-    def stability_history(self) -> list[list[float]]:
-        return self._stability_history
+    def stability_history(self) -> np.ndarray:
+        """
+        (frames, stability_duration) view of recent similarities, oldest first.
 
-    @stability_history.setter
-    def stability_history(self, val):
-        self._stability_history = val
+        This aliases the history buffer and is only valid until the next
+        frame is processed.
+        """
+        return self._stability_history.view()
 
     @contextlib.contextmanager
-    def frame_context(self, frame_data: bytes):
+    def frame_context(self, features: np.ndarray):
         yield  # Do something with the frame
 
         # Capture the frame stuff
-        self.prior_frames.append(frame_data)
+        self.prior_frames.append(features)
         self.total_frames_processed += 1
 
-        if len(self.prior_frames) > self.stability_duration:
-            self.prior_frames.pop(0)
-
-    def process_frame(self, frame_data: bytes) -> bool:
+    def process_frame(self, frame_data: EvfFrame) -> bool:
         """
         Process a new live view frame for auto-capture.
 
         Args:
-            frame_data: Raw image data from live view
+            frame_data: Live view frame, its decoded forms are cached on it
 
         Returns:
             True if a capture should be triggered, False otherwise
         """
 
-        with self.frame_context(frame_data):
+        features = self._frame_features(frame_data)
+        if features is None:
+            # Nothing we can compare against, skip the frame entirely
+            return False
+
+        with self.frame_context(features):
             if self.last_captured_image is not None:
                 if (
-                    self._calculate_frame_similarity(
-                        frame_data,
-                        self.last_captured_image,
-                    )
+                    self._feature_similarity(features, self.last_captured_image)
                     >= self.stability_threshold
                 ):
                     # The last image we captured is very similar to this one,
@@ -86,10 +118,10 @@ class AutoCaptureManager(GObject.GObject):
                     # We have a processed image that is not similar to our
                     # prior captured image, so we're gonna reset
                     self.last_captured_image = None
-                    self.prior_frames = [frame_data]
+                    self.prior_frames.clear()
                     return False
 
-            if not self._is_image_stable(frame_data):
+            if not self._is_image_stable(features):
                 # The image is not stable
                 return False
 
@@ -98,80 +130,41 @@ class AutoCaptureManager(GObject.GObject):
 
             # The image is both sufficiently dissimilar to the last capture, and we also
             # are presently stable
-            self.last_captured_image = frame_data
+            self.last_captured_image = features.copy()
             return True
 
-    def _calculate_frame_similarity(
-        self, frame_data1: bytes, frame_data2: bytes
-    ) -> float:
-        """
-        Calculate similarity between two frames using correlation.
-
-        Args:
-            frame_data1: First frame data
-            frame_data2: Second frame data
+    def _feature_similarity(self, features1: np.ndarray, features2: np.ndarray):
+        return float(
+            self.detector.similarity(
+                features2[np.newaxis], features1, self._similarities[:1]
+            )[0]
+        )
 
-        Returns:
-            Correlation coefficient (0-1), higher means more similar
+    def _frame_features(self, frame_data: EvfFrame) -> np.ndarray | None:
         """
-        img1 = self._frame_data_to_array(frame_data1)
-        img2 = self._frame_data_to_array(frame_data2)
+        Reduce a frame to the features the detector compares.
 
-        if img1.size == 0 or img2.size == 0:
-            return 0.0
+        The returned array may live in a workspace that the next call overwrites.
+        """
+        return self.detector.features(frame_data)
 
-        # Apply Hanning window to reduce edge importance
-        hanning_window = (
-            np.hanning(img1.shape[0])[:, np.newaxis]
-            * np.hanning(img1.shape[1])[np.newaxis, :]
-        )
-        img1_windowed = img1 * hanning_window
-        img2_windowed = img2 * hanning_window
-
-        # Use normalized cross-correlation for similarity
-        correlation = np.corrcoef(img1_windowed.flatten(), img2_windowed.flatten())[
-            0, 1
-        ]
-
-        # Handle NaN case when images are constant
-        if np.isnan(correlation):
-            correlation = 1.0 if np.array_equal(img1, img2) else 0.0
-
-        return max(0.0, correlation)  # Ensure non-negative
-
-    def _frame_data_to_array(self, frame_data: bytes) -> np.ndarray:
-        """Convert frame data to numpy array for correlation analysis."""
-        nparr = np.frombuffer(frame_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
-        if frame is None:
-            return np.array([])
-        return cv2.resize(frame, (64, 64))  # Resize for faster processing
-
-    def _is_image_stable(self, frame_data: bytes) -> bool:
-        """Check if the current image is stable using correlation with the monitoring image."""
-        if not self.prior_frames:
+    def _is_image_stable(self, features: np.ndarray) -> bool:
+        """Check if the current image is stable by comparing it with the prior frames."""
+        if not len(self.prior_frames):
             return False
 
-        previous_similarities = [
-            self._calculate_frame_similarity(frame_data, prior)
-            for prior in self.prior_frames
-        ]
-
-        self._stability_history.append(
-            list(
-                [
-                    0
-                    for _ in range(
-                        int(self.stability_duration) - len(previous_similarities)
-                    )
-                ]
-            )
-            + previous_similarities
+        # Similarity against every prior frame at once, oldest first
+        priors = self.prior_frames.view()
+        previous_similarities = self.detector.similarity(
+            priors, features, self._similarities[: len(priors)]
         )
 
-        # If our history rolls over 100 we can drop the first element
-        if len(self._stability_history) > 50:
-            self._stability_history.pop(0)
+        # Right align against the row, frames we don't have yet count as 0
+        self._history_row[:] = 0
+        self._history_row[self.stability_duration - len(previous_similarities) :] = (
+            previous_similarities
+        )
+        self._stability_history.append(self._history_row)
 
         similarity = np.average(previous_similarities)
         self.notify("stability-history")
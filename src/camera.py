@@ -8,7 +8,7 @@ log = logging.getLogger(__name__)
 
 from src.camera_core.object_events import EdsObjectEventEnum
 from src.common_signal import SignalName
-from src.picture import CassetteItem
+from src.picture import CaptureContext
 
 from .camera_core import (
     EDS_ERR_OK,
@@ -27,10 +27,19 @@ from .camera_core import (
     kEdsCameraCommand_ShutterButton_Halfway,
     kEdsCameraCommand_ShutterButton_OFF,
 )
-from .camera_core.download import clear_photo_request, set_next_photo_request
+from .camera_core.download import (
+    PhotoRequest,
+    clear_photo_request,
+    set_next_photo_request,
+)
+from .camera_core.event_pump import event_pump
+from .camera_core.executor import CommandPriority, sdk_command, sdk_executor
 from .camera_core.manager import CameraManager
 from .camera_core.properties import waiting
 
+# How long the camera gets to hand over the image of a shot
+TRANSFER_TIMEOUT = 15.0
+
 
 class Camera:
     manager: CameraManager
@@ -57,16 +66,20 @@ class Camera:
         )
 
     def close(self):
-        edsdk.EdsCloseSession(self.ref)
-        edsdk.EdsRelease(self.ref)
+        sdk_executor.call(CommandPriority.PROPERTY, self._close_session)
         self.connected.clear()
         self.manager.signal.emit(SignalName.CameraDisconnected.name)
 
+    def _close_session(self):
+        edsdk.EdsCloseSession(self.ref)
+        edsdk.EdsRelease(self.ref)
+
     def open(self):
         self.manager.initialized.wait()
         self.manager.open_session(self.ref)
         self.connected.set()
 
+    @sdk_command(CommandPriority.PROPERTY)
     def get_device_info(self) -> EdsDeviceInfo:
         device_info = EdsDeviceInfo()
         err = edsdk.EdsGetDeviceInfo(
@@ -79,6 +92,7 @@ class Camera:
 
         return device_info
 
+    @sdk_command(CommandPriority.PROPERTY)
     def get_property_value(self, property_id: EdsPropertyIDEnum) -> int:
         value = EdsUInt32()
         err = edsdk.EdsGetPropertyData(
@@ -115,6 +129,7 @@ class Camera:
 
         self.manager.signal.emit(SignalName.LiveViewRunning.name)
 
+    @sdk_command(CommandPriority.EVF)
     def download_evf_image(self):
         # Create memory stream
         stream = EdsStreamRef()
@@ -147,21 +162,31 @@ class Camera:
 
         return data
 
-    def emit(self, sig: SignalName):
-        self.manager.signal.emit(sig.name)
+    @sdk_command(CommandPriority.SHUTTER)
+    def press_shutter(self, state: int) -> int:
+        """Move the shutter button to `state`, returns the EDSDK error."""
+        return edsdk.EdsSendCommand(
+            self.ref, kEdsCameraCommand_PressShutterButton, state
+        )
+
+    def emit(self, sig: SignalName, *args):
+        self.manager.signal.emit(sig.name, *args)
 
     def take_picture_sequence(self, _):
         def inner():
             with self.picture_lock:
+                # Poll for camera events at full speed from the first command
+                event_pump.wake()
                 try:
                     self.focus()
-                    self.take_picture(self.manager.signal.cassette)
+                    self.take_picture(
+                        CaptureContext.from_cassette(self.manager.signal.cassette)
+                    )
                 except Exception as e:
                     traceback.print_exception(e)
                     self.emit(SignalName.TakePictureError)
 
                 log.info("Done with picture taking sequence!")
-                clear_photo_request()
 
         if self.picture_lock.locked():
             return
@@ -175,22 +200,14 @@ class Camera:
         log.debug("Sending half-press shutter command...")
         self.emit(SignalName.Focusing)
 
-        err = edsdk.EdsSendCommand(
-            self.ref,
-            kEdsCameraCommand_PressShutterButton,
-            kEdsCameraCommand_ShutterButton_Halfway,
-        )
+        err = self.press_shutter(kEdsCameraCommand_ShutterButton_Halfway)
 
         if err != EDS_ERR_OK:
             raise CameraException(f"Failed to start auto-focus: {err}")
 
         log.debug("Half-press command sent successfully")
         # Release the shutter button to end focus operation
-        err = edsdk.EdsSendCommand(
-            self.ref,
-            kEdsCameraCommand_PressShutterButton,
-            kEdsCameraCommand_ShutterButton_OFF,
-        )
+        err = self.press_shutter(kEdsCameraCommand_ShutterButton_OFF)
 
         if err != EDS_ERR_OK:
             raise CameraException(err)
@@ -199,40 +216,66 @@ class Camera:
         self.emit(SignalName.FocusDone)
         return True
 
-    def take_picture(self, req: CassetteItem):
-        """Take a picture using the camera."""
+    def take_picture(self, req: CaptureContext):
+        """
+        Take a picture using the camera.
+
+        Returns as soon as the camera has handed the image over, the download
+        carries on in the background so the next shot can start right away.
+        ImageDownloaded (or ImageDownloadFailed) is emitted with the id of the
+        shot once it is on disk.
+        """
         log.info("Taking picture...")
-        set_next_photo_request(req)
+        request = set_next_photo_request(req, self._on_image_downloaded)
         self.object_event[EdsObjectEventEnum.DirItemRequestTransfer].clear()
 
-        # Use PressShutter instead of TakePicture command for better compatibility
-        self.emit(SignalName.ShutterDown)
-        err = edsdk.EdsSendCommand(
-            self.ref,
-            kEdsCameraCommand_PressShutterButton,
-            kEdsCameraCommand_ShutterButton_Completely_NonAF,
-        )
-
-        if err != EDS_ERR_OK:
-            # Release the shutter button
-            edsdk.EdsSendCommand(
-                self.ref,
-                kEdsCameraCommand_PressShutterButton,
-                kEdsCameraCommand_ShutterButton_OFF,
-            )
-            raise CameraException(err)
+        try:
+            # Use PressShutter instead of TakePicture command for better compatibility
+            self.emit(SignalName.ShutterDown)
+            err = self.press_shutter(kEdsCameraCommand_ShutterButton_Completely_NonAF)
 
-        # Release the shutter button
-        err = edsdk.EdsSendCommand(
-            self.ref,
-            kEdsCameraCommand_PressShutterButton,
-            kEdsCameraCommand_ShutterButton_OFF,
-        )
-        if err != EDS_ERR_OK:
-            raise CameraException(err)
+            if err != EDS_ERR_OK:
+                # Release the shutter button
+                self.press_shutter(kEdsCameraCommand_ShutterButton_OFF)
+                raise CameraException(err)
 
-        self.emit(SignalName.ShutterRelease)
-        self.object_event[EdsObjectEventEnum.DirItemRequestTransfer].wait()
-        self.emit(SignalName.ImageDownloading)
-        download.downloaded_image_available.wait()
-        self.emit(SignalName.ImageDownloaded)
+            # Release the shutter button
+            err = self.press_shutter(kEdsCameraCommand_ShutterButton_OFF)
+            if err != EDS_ERR_OK:
+                raise CameraException(err)
+        except Exception:
+            # The camera can fire before a command fails. Its transfer then
+            # still belongs to this request, dropping it would hand the image
+            # to the next shot's request instead.
+            if not self._wait_for_transfer(request):
+                raise
+            log.warning(f"Shutter command failed, but shot {request.id} was taken")
+            self.emit(SignalName.ShutterRelease)
+        else:
+            self.emit(SignalName.ShutterRelease)
+            if not self._wait_for_transfer(request):
+                raise CameraException(
+                    f"Camera did not hand over shot {request.id} "
+                    f"within {TRANSFER_TIMEOUT:.0f}s"
+                )
+
+        self.emit(SignalName.ImageDownloading, request.id)
+
+    def _wait_for_transfer(self, request: PhotoRequest) -> bool:
+        """
+        Wait for the camera to hand over the image of `request`. If it does
+        not in time, the shot is taken to have never happened and is forgotten.
+        """
+        if self.object_event[EdsObjectEventEnum.DirItemRequestTransfer].wait(
+            TRANSFER_TIMEOUT
+        ):
+            return True
+
+        clear_photo_request(request)
+        return False
+
+    def _on_image_downloaded(self, request: PhotoRequest, filename: str | None):
+        if filename is None:
+            self.emit(SignalName.ImageDownloadFailed, request.id)
+        else:
+            self.emit(SignalName.ImageDownloaded, request.id)
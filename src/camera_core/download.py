@@ -1,12 +1,18 @@
 import ctypes
-import datetime
+import itertools
 import logging
 import os
-from threading import Event
-
-from src.exif_utils import add_metadata_to_image
-from src.picture import CassetteItem
-from src.settings import Settings
+import time
+from collections import deque
+from dataclasses import dataclass
+from queue import Queue
+from threading import Condition, Event, Thread
+from typing import Callable
+
+from src.metadata_writer import MetadataWriterPool
+from src.picture import CaptureContext
+from src.sequence_index import SequenceAllocator
+from src.settings import get_settings
 
 log = logging.getLogger(__name__)
 
@@ -17,13 +23,53 @@ from . import (
     edsdk,
     kEdsObjectEvent_DirItemRequestTransfer,
 )
+from .executor import CommandPriority, sdk_executor
 from .object_events import EdsObjectEventEnum
-from .sdk import EdsBaseRef, EdsStreamRef, EdsUInt64
+from .sdk import (
+    EdsBaseRef,
+    EdsStreamRef,
+    kEdsAccess_ReadWrite,
+    kEdsFileCreateDisposition_CreateAlways,
+)
+
+# Shots that may be in flight at once, counting from the shutter press until
+# the file is on disk. Further shots wait for a download to finish.
+MAX_PENDING_DOWNLOADS = 8
+
+# Images are pulled off the camera in blocks of this size, so progress can be
+# reported while a large RAW is still transferring
+DOWNLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+@dataclass
+class PhotoRequest:
+    """A shot waiting for its image, with the cassette state it was taken with."""
+
+    id: int
+    item: CaptureContext
+    on_done: Callable[["PhotoRequest", str | None], None] | None = None
+
+
+@dataclass(slots=True)
+class DownloadProgress:
+    """How far the current transfer has got."""
+
+    filename: str
+    transferred: int
+    size: int
+    elapsed: float
+
+    @property
+    def fraction(self) -> float:
+        return self.transferred / self.size if self.size else 1.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.transferred / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
 
 # Global references for callbacks
-queued_photo_request: CassetteItem | None = None
-last_downloaded_photo: tuple[CassetteItem, str] | None = None
-downloaded_image_available = Event()
+last_downloaded_photo: tuple[CaptureContext, str] | None = None
 format_to_extension = {
     0x00000000: ".jpg",  # kEdsImageType_Unknown
     0x00000001: ".jpg",  # kEdsImageType_Jpeg
@@ -34,38 +80,90 @@ format_to_extension = {
     0xB108: ".cr3",  # kEdsObjectFormat_CR3
 }
 object_event = {e: Event() for e in EdsObjectEventEnum}
+# Called with the request id and path of every downloaded image once it is on disk
+file_written_listeners: list[Callable[[int, str], None]] = []
+# Called from the download thread after every block that is transferred
+download_progress_listeners: list[Callable[[DownloadProgress], None]] = []
+# Tags downloaded images after they have been written
+metadata_writer = MetadataWriterPool()
+# Numbers the images of each cassette, CassetteName_001.jpg and so on
+sequence_allocator = SequenceAllocator()
 
+# Shots the camera has not handed over yet, oldest first. The camera
+# transfers images in the order they were taken, so every
+# DirItemRequestTransfer belongs to the oldest of these.
+awaiting_transfer: deque[PhotoRequest] = deque()
+# Transferred shots waiting for the download thread
+download_queue: Queue[tuple[EdsBaseRef, PhotoRequest]] = Queue()
+_requests = Condition()
+_request_ids = itertools.count(1)
+_in_flight = 0
+_download_thread: Thread | None = None
 
-def set_next_photo_request(item: CassetteItem):
-    global queued_photo_request
 
-    if queued_photo_request is not None:
-        raise Exception(
-            "We cannot queue a next photo request while one is already unfulfilled"
-        )
+def set_next_photo_request(
+    item: CaptureContext,
+    on_done: Callable[[PhotoRequest, str | None], None] | None = None,
+) -> PhotoRequest:
+    """
+    Queue up the shot about to be taken.
+
+    Blocks while MAX_PENDING_DOWNLOADS shots are still being downloaded.
+    `on_done` is called from the download thread with the saved filename, or
+    None if the download failed.
+    """
+    global _in_flight
+
+    with _requests:
+        _requests.wait_for(lambda: _in_flight < MAX_PENDING_DOWNLOADS)
+
+        request = PhotoRequest(next(_request_ids), item, on_done)
+        awaiting_transfer.append(request)
+        _in_flight += 1
 
-    queued_photo_request = item
-    downloaded_image_available.clear()
+    return request
 
 
-def clear_photo_request():
-    global queued_photo_request
-    queued_photo_request = None
-    downloaded_image_available.set()
+def clear_photo_request(request: PhotoRequest):
+    """Forget a shot the camera never took, e.g. because the shutter failed."""
+    global _in_flight
 
+    with _requests:
+        if request in awaiting_transfer:
+            awaiting_transfer.remove(request)
+            _in_flight -= 1
+            _requests.notify_all()
 
-def get_current_photo_request() -> CassetteItem | None:
-    return queued_photo_request
 
+def get_current_photo_request() -> CaptureContext | None:
+    """The oldest shot still waiting on the camera, if any."""
+    with _requests:
+        return awaiting_transfer[0].item if awaiting_transfer else None
 
-def download_image(directory_item: EdsBaseRef, photo_req: CassetteItem) -> str | None:
+
+def pending_downloads() -> int:
+    """Shots taken (or being taken) whose file is not on disk yet."""
+    with _requests:
+        return _in_flight
+
+
+def wait_for_downloads(timeout: float | None = None) -> bool:
+    """Wait until every shot taken so far is on disk."""
+    with _requests:
+        return _requests.wait_for(lambda: _in_flight == 0, timeout)
+
+
+def download_image(directory_item: EdsBaseRef, request: PhotoRequest) -> str | None:
+    photo_req = request.item
     # First of all, grab the settings so we know where to save files
-    settings = Settings()
+    settings = get_settings()
 
     log.debug("Downloading image...")
     # Get directory item information
     dir_item_info = EdsDirectoryItemInfo()
-    err = edsdk.EdsGetDirectoryItemInfo(
+    err = sdk_executor.call(
+        CommandPriority.TRANSFER,
+        edsdk.EdsGetDirectoryItemInfo,
         directory_item,
         ctypes.byref(dir_item_info),
     )
@@ -86,133 +184,187 @@ def download_image(directory_item: EdsBaseRef, photo_req: CassetteItem) -> str |
     )
 
     # Create output directory if it doesn't exist
-    outdir = os.path.join(settings.photo_location, (photo_req.name or "default"))
+    cassette_name = photo_req.name or "default"
+    outdir = os.path.join(settings.photo_location, cassette_name)
 
     os.makedirs(
         outdir,
         exist_ok=True,
     )
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}{extension}"
-
-    filepath = os.path.join(
-        outdir,
-        filename,
-    )
+    filepath = sequence_allocator.allocate(outdir, cassette_name, extension)
+    filename = os.path.basename(filepath)
 
     log.debug(f"Target filepath: {filepath}")
-    # Download to memory stream first, then copy to file
-    log.debug("Creating memory stream for download...")
-    mem_stream = EdsStreamRef()
-    err = edsdk.EdsCreateMemoryStream(EdsUInt64(0), ctypes.byref(mem_stream))
+    # Let the SDK write the file itself, so the image never passes through
+    # Python memory. It goes to a partial file first and is only renamed into
+    # place once complete, a crash mid-download never leaves a truncated
+    # image under the real name.
+    partial_path = f"{filepath}.part"
+    log.debug("Creating file stream for download...")
+    file_stream = EdsStreamRef()
+    err = sdk_executor.call(
+        CommandPriority.TRANSFER,
+        edsdk.EdsCreateFileStream,
+        partial_path.encode(),
+        kEdsFileCreateDisposition_CreateAlways,
+        kEdsAccess_ReadWrite,
+        ctypes.byref(file_stream),
+    )
     if err != EDS_ERR_OK:
-        log.error(f"Failed to create memory stream: {err}")
+        log.error(f"Failed to create file stream: {err}")
+        _cancel_download(directory_item)
         raise CameraException(err)
 
     try:
-        log.debug("Downloading to memory stream...")
-        # Download the image to memory
-        err = edsdk.EdsDownload(directory_item, dir_item_info.size, mem_stream)
-        if err != EDS_ERR_OK:
-            log.error(f"EdsDownload to memory failed: {err}")
-            raise CameraException(err)
+        log.debug("Downloading to file stream...")
+        progress = _download_blocks(
+            directory_item, dir_item_info.size, file_stream, filename
+        )
+        log.info(
+            f"Transferred {progress.size} bytes in {progress.elapsed:.2f}s "
+            f"({progress.mb_per_second:.1f} MB/s)"
+        )
 
-        log.debug("Download to memory completed, calling EdsDownloadComplete...")
+        log.debug("Download to file completed, calling EdsDownloadComplete...")
         # Complete the download
-        err = edsdk.EdsDownloadComplete(directory_item)
+        err = sdk_executor.call(
+            CommandPriority.TRANSFER, edsdk.EdsDownloadComplete, directory_item
+        )
         if err != EDS_ERR_OK:
             log.error(f"EdsDownloadComplete failed: {err}")
             raise CameraException(err)
+    except Exception:
+        _cancel_download(directory_item)
+        sdk_executor.call(CommandPriority.TRANSFER, edsdk.EdsRelease, file_stream)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    # Releasing the stream closes the file
+    sdk_executor.call(CommandPriority.TRANSFER, edsdk.EdsRelease, file_stream)
+    os.replace(partial_path, filepath)
+
+    # Check if file was actually written
+    file_size = os.path.getsize(filepath)
+    log.info(f"File created: {filepath}, size: {file_size} bytes")
+    if file_size != dir_item_info.size:
+        log.warning(f"Expected {dir_item_info.size} bytes but got {file_size}")
+
+    for listener in file_written_listeners:
+        listener(request.id, filepath)
+
+    metadata_writer.submit(filepath, dir_item_info.format, photo_req)
+
+    return filename
+
+
+def _download_blocks(
+    directory_item: EdsBaseRef, size: int, stream: EdsStreamRef, filename: str
+) -> DownloadProgress:
+    """
+    Transfer the item into `stream` with one EdsDownload per block. The SDK
+    continues each call where the previous one stopped, until
+    EdsDownloadComplete.
+    """
+    started = time.monotonic()
+    progress = DownloadProgress(filename, 0, size, 0.0)
+
+    while progress.transferred < size:
+        block = min(DOWNLOAD_BLOCK_SIZE, size - progress.transferred)
+        err = sdk_executor.call(
+            CommandPriority.TRANSFER, edsdk.EdsDownload, directory_item, block, stream
+        )
+        if err != EDS_ERR_OK:
+            log.error(
+                f"EdsDownload failed after {progress.transferred} of {size} bytes: {err}"
+            )
+            raise CameraException(err)
 
-        # Get the data from memory stream
-        pointer = ctypes.c_void_p()
-        length = EdsUInt64()
-        edsdk.EdsGetPointer(mem_stream, ctypes.byref(pointer))
-        edsdk.EdsGetLength(mem_stream, ctypes.byref(length))
-
-        log.debug(f"Downloaded data size: {length.value} bytes")
-
-        # Extract the data
-        data = ctypes.string_at(pointer, length.value)
-
-        # For CR3 files, write first then add metadata using exiftool
-        if dir_item_info.format in [0xB108, 0x0000B108]:
-            # Write to file first
-            log.debug(f"Writing {len(data)} bytes to file: {filepath}")
-            with open(filepath, "wb") as f:
-                f.write(data)
-
-            # Add metadata using exiftool after file is written
-            log.debug("Adding metadata to image...")
-            try:
-                add_metadata_to_image(data, photo_req, dir_item_info.format, filepath)
-                log.debug("Metadata added successfully")
-            except Exception as e:
-                log.warning(f"Failed to add metadata: {e}")
-
-            data_with_metadata = data
-        else:
-            # For other formats, add metadata then write
-            log.debug("Adding metadata to image...")
-            try:
-                data_with_metadata = add_metadata_to_image(
-                    data, photo_req, dir_item_info.format, filepath
-                )
-                log.debug("Metadata added successfully")
-            except Exception as e:
-                log.warning(f"Failed to add metadata: {e}")
-                data_with_metadata = data
-
-            # Write to file manually
-            log.debug(f"Writing {len(data_with_metadata)} bytes to file: {filepath}")
-            with open(filepath, "wb") as f:
-                f.write(data_with_metadata)
-
-        # Check if file was actually written
-        if os.path.exists(filepath):
-            file_size = os.path.getsize(filepath)
-            log.info(f"File created: {filepath}, size: {file_size} bytes")
-            if file_size == 0:
-                log.warning("File is still 0 bytes!")
-            else:
-                log.debug(f"SUCCESS: File has {file_size} bytes")
-        else:
-            log.error(f"ERROR: File was not created: {filepath}")
+        progress.transferred += block
+        progress.elapsed = time.monotonic() - started
+
+        for listener in download_progress_listeners:
+            listener(progress)
+
+    return progress
+
+
+def _cancel_download(directory_item: EdsBaseRef):
+    """
+    Tell the camera an unfinished transfer is abandoned, so it does not keep
+    the image around waiting for the rest of it.
+    """
+    err = sdk_executor.call(
+        CommandPriority.TRANSFER, edsdk.EdsDownloadCancel, directory_item
+    )
+    if err != EDS_ERR_OK:
+        log.warning(f"EdsDownloadCancel failed: {err}")
+
+
+def _download_worker():
+    """Download transferred shots one at a time, in the order they were taken."""
+    global last_downloaded_photo, _in_flight
+
+    while True:
+        directory_item, request = download_queue.get()
+        filename = None
+
+        try:
+            filename = download_image(directory_item, request)
+            if not filename:
+                raise Exception("Filename was none-ish")
+
+            last_downloaded_photo = (request.item, filename)
+            log.info(f"Successfully downloaded image {request.id}: {filename}")
+        except Exception as e:
+            log.error(f"Failed to download image {request.id}: {e}")
+        finally:
+            sdk_executor.call(
+                CommandPriority.TRANSFER, edsdk.EdsRelease, directory_item
+            )
+
+        try:
+            if request.on_done is not None:
+                request.on_done(request, filename)
+        finally:
+            with _requests:
+                _in_flight -= 1
+                _requests.notify_all()
 
-        return filename
-    finally:
-        edsdk.EdsRelease(mem_stream)
+
+def _ensure_download_thread():
+    global _download_thread
+
+    if _download_thread is None or not _download_thread.is_alive():
+        _download_thread = Thread(
+            target=_download_worker, name="image-download", daemon=True
+        )
+        _download_thread.start()
 
 
 # Object event callback (for image capture events)
 def _object_callback(event, object_ref, context):
-    global queued_photo_request, last_downloaded_photo, object_event
+    global object_event
     enum = EdsObjectEventEnum(event)
 
     log.debug(f"Got object event from camera: {enum} {event}, {object_ref}")
-    object_event[enum].set()
 
     if event == kEdsObjectEvent_DirItemRequestTransfer:
         log.debug("Camera requesting image transfer!")
 
-        try:
-            # Download the image
-            req = get_current_photo_request()
-            if req is None:
-                raise Exception("No queued request")
-
-            filename = download_image(object_ref, req)
-            if not filename:
-                raise Exception("Filename was none-ish")
+        with _requests:
+            request = awaiting_transfer.popleft() if awaiting_transfer else None
 
-            downloaded_image_available.set()
-            last_downloaded_photo = (req, filename)
-
-            log.info(f"Successfully downloaded image: {filename}")
-        except Exception as e:
-            log.error(f"Failed to download image: {e}")
+        if request is None:
+            log.error("Failed to download image: No queued request")
+            _cancel_download(object_ref)
+            sdk_executor.call(CommandPriority.TRANSFER, edsdk.EdsRelease, object_ref)
+        else:
+            # Hand the download off so the camera is free for the next shot
+            _ensure_download_thread()
+            download_queue.put((object_ref, request))
 
-        clear_photo_request()
+    object_event[enum].set()
 
     return EDS_ERR_OK
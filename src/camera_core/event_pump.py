@@ -0,0 +1,149 @@
+import ctypes
+import logging
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import Any, Callable
+
+import numpy as np
+
+from . import EdsUInt32, edsdk
+from .executor import CommandPriority, sdk_executor
+
+log = logging.getLogger(__name__)
+
+# Latency samples kept for the percentiles
+LATENCY_SAMPLES = 1000
+
+
+class EventPump:
+    """
+    Calls EdsGetEvent on a thread of its own.
+
+    EDSDK only runs the object, property and state handlers from inside
+    EdsGetEvent, so whatever time passes between two calls is added to every
+    callback, DirItemRequestTransfer included. While `busy` says a shot or a
+    download is in flight the pump polls every `busy_interval`, and keeps
+    doing so for `linger` seconds after, otherwise it drops to `idle_interval`
+    to save wakeups. `wake` cuts an idle wait short, e.g. when a shot starts.
+
+    Handlers wrapped with `track` count their deliveries. Every poll that
+    delivered something records how long its events can have waited: the
+    time since the previous poll returned plus the poll itself.
+    """
+
+    busy_interval: float
+    idle_interval: float
+    linger: float
+    polls: int
+    deliveries: int
+
+    def __init__(
+        self,
+        busy_interval: float = 0.005,
+        idle_interval: float = 0.1,
+        linger: float = 0.5,
+    ):
+        self.busy_interval = busy_interval
+        self.idle_interval = idle_interval
+        self.linger = linger
+        self.polls = 0
+        self.deliveries = 0
+
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = Lock()
+        self._wake = Event()
+        self._running = Event()
+        self._thread: Thread | None = None
+
+    def start(self, camera: Callable[[], Any], busy: Callable[[], bool]):
+        """
+        Args:
+            camera: Returns the camera ref to pump events for, or None
+            busy: Whether a capture or download is in flight
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._running.set()
+        self._thread = Thread(
+            target=self._run, args=(camera, busy), name="edsdk-events", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._running.clear()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        if p := self.latency_percentiles():
+            log.info(
+                f"Event delivery over {self.polls} polls: "
+                + " ".join(f"p{q} {ms:.1f}ms" for q, ms in p.items())
+            )
+
+    def wake(self):
+        self._wake.set()
+
+    def track(self, handler: Callable) -> Callable:
+        """Wrap an EDSDK handler so its deliveries are counted."""
+
+        def tracked(*args):
+            self.deliveries += 1
+            return handler(*args)
+
+        return tracked
+
+    def latency_percentiles(
+        self, q: tuple[int, ...] = (50, 90, 99)
+    ) -> dict[int, float]:
+        """Percentiles (ms) of how long delivered events may have waited."""
+        with self._lock:
+            samples = list(self._latencies)
+
+        if not samples:
+            return {}
+
+        return dict(zip(q, (np.percentile(samples, q) * 1000).tolist()))
+
+    def _run(self, camera: Callable[[], Any], busy: Callable[[], bool]):
+        event = EdsUInt32()
+        last_poll = time.monotonic()
+        busy_until = 0.0
+
+        while self._running.is_set():
+            now = time.monotonic()
+            if busy():
+                busy_until = now + self.linger
+
+            interval = self.busy_interval if now < busy_until else self.idle_interval
+            if self._wake.wait(interval):
+                self._wake.clear()
+                busy_until = time.monotonic() + self.linger
+
+            camera_ref = camera()
+            if camera_ref is None or edsdk is None:
+                last_poll = time.monotonic()
+                continue
+
+            deliveries = self.deliveries
+            sdk_executor.call(
+                CommandPriority.EVENT,
+                edsdk.EdsGetEvent,
+                camera_ref,
+                ctypes.byref(event),
+            )
+            self.polls += 1
+            polled = time.monotonic()
+
+            if self.deliveries != deliveries:
+                with self._lock:
+                    self._latencies.append(polled - last_poll)
+
+            last_poll = polled
+
+
+# One pump for the SDK, started once a camera is around
+event_pump = EventPump()
@@ -0,0 +1,156 @@
+import functools
+import itertools
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
+from queue import PriorityQueue
+from threading import Lock, Thread, get_ident
+from typing import Any, Callable
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Queue wait samples kept per priority
+WAIT_SAMPLES = 1000
+
+
+class CommandPriority(IntEnum):
+    """Which SDK command runs first when several are waiting, lowest first."""
+
+    SHUTTER = 0
+    # EdsGetEvent, the transfer of the shot that was just taken arrives through it
+    EVENT = 1
+    TRANSFER = 2
+    EVF = 3
+    PROPERTY = 4
+
+
+class SdkExecutor:
+    """
+    Runs every EDSDK call on one thread, in priority order.
+
+    The SDK is reached from the live view loop, the capture threads, the
+    download thread and the event pump. Funnelling the calls through a single
+    owner means they never overlap, and a waiting shutter command goes before
+    a queued EVF download, which goes before a property read. Calls of equal
+    priority run in the order they were submitted.
+
+    A command that is submitted from the executor thread itself (a property
+    read inside an event handler, say) runs inline, as queueing it would wait
+    on itself. How long commands waited in the queue is recorded per priority.
+    """
+
+    def __init__(self):
+        self._queue: PriorityQueue[tuple[int, int, Callable[[], None] | None]] = (
+            PriorityQueue()
+        )
+        self._sequence = itertools.count()
+        self._waits: dict[CommandPriority, deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in CommandPriority
+        }
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self._thread_id: int | None = None
+
+    def submit(
+        self, priority: CommandPriority, fn: Callable, *args, **kwargs
+    ) -> Future:
+        """Queue `fn(*args, **kwargs)`, the future resolves with its result."""
+        future: Future = Future()
+        submitted = time.monotonic()
+
+        def command():
+            if not future.set_running_or_notify_cancel():
+                return
+
+            with self._lock:
+                self._waits[priority].append(time.monotonic() - submitted)
+
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self._ensure_thread()
+        self._queue.put((priority, next(self._sequence), command))
+        return future
+
+    def call(self, priority: CommandPriority, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn` on the executor thread and wait for its result."""
+        if get_ident() == self._thread_id:
+            return fn(*args, **kwargs)
+
+        return self.submit(priority, fn, *args, **kwargs).result()
+
+    def shutdown(self, timeout: float | None = None):
+        """Stop the thread once everything already queued has run."""
+        thread = self._thread
+        if thread is None:
+            return
+
+        # Sorts after every real command
+        self._queue.put((len(CommandPriority), next(self._sequence), None))
+        thread.join(timeout)
+        self._thread = None
+
+        for priority, p in self.wait_percentiles().items():
+            log.info(
+                f"SDK queue wait for {priority}: "
+                + " ".join(f"p{q} {ms:.1f}ms" for q, ms in p.items())
+            )
+
+    def wait_percentiles(
+        self, q: tuple[int, ...] = (50, 90, 99)
+    ) -> dict[str, dict[int, float]]:
+        """Percentiles (ms) of the queue wait, per priority that has run."""
+        with self._lock:
+            waits = {
+                priority.name: list(samples)
+                for priority, samples in self._waits.items()
+                if samples
+            }
+
+        return {
+            name: dict(zip(q, (np.percentile(samples, q) * 1000).tolist()))
+            for name, samples in waits.items()
+        }
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._thread = Thread(target=self._run, name="edsdk-commands", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        self._thread_id = get_ident()
+
+        while True:
+            _, _, command = self._queue.get()
+            if command is None:
+                break
+
+            command()
+
+        self._thread_id = None
+
+
+# The one thread allowed to talk to the SDK
+sdk_executor = SdkExecutor()
+
+
+def sdk_command(priority: CommandPriority):
+    """Run the decorated function on the SDK thread with `priority`."""
+
+    def decorator(inner):
+        @functools.wraps(inner)
+        def wrapper(*args, **kwargs):
+            return sdk_executor.call(priority, inner, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,618 @@
+"""
+A stand-in for libEDSDK.so, for running the app and benchmarks headless.
+
+`FakeEdsdk` exposes the subset of EDSDK calls this project makes, with the
+same calling convention as the ctypes library: output arguments are passed
+with `ctypes.byref`, handles are `c_void_p`s and every call returns an
+EdsError. Callbacks are queued and only delivered from `EdsGetEvent`, just
+like the real SDK on Linux.
+
+The simulated camera has configurable latencies and image sizes so the full
+focus -> shutter -> transfer -> download path can be load tested. It is
+switched on by setting SLIDESCANNER_FAKE_EDSDK, either to 1 or to a comma
+separated list of `FakeCameraConfig` overrides:
+
+    SLIDESCANNER_FAKE_EDSDK="capture_size=3000x2000,transfer_rate=20e6"
+"""
+
+import ctypes
+import dataclasses
+import functools
+import heapq
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from .err import EDS_ERR_OK, ErrorCode
+from .object_events import EdsObjectEventEnum
+from .prop_values import AvEnum, EdsBatteryLevel2, ISOEnum, TvEnum
+from .sdk import (
+    EdsDeviceInfo,
+    EdsDirectoryItemInfo,
+    kEdsCameraCommand_PressShutterButton,
+    kEdsCameraCommand_ShutterButton_Completely_NonAF,
+    kEdsCameraCommand_ShutterButton_Halfway,
+    kEdsCameraCommand_TakePicture,
+    kEdsDataType_String,
+    kEdsDataType_UInt32,
+    kEdsImageType_Jpeg,
+    kEdsPropertyEvent_PropertyChanged,
+)
+from .state_events import StateEvent
+
+log = logging.getLogger(__name__)
+
+ENV_VAR = "SLIDESCANNER_FAKE_EDSDK"
+
+
+@dataclass
+class FakeCameraConfig:
+    """Behaviour of the simulated camera. Times in seconds, sizes in pixels."""
+
+    camera_count: int = 1
+    evf_size: tuple[int, int] = (960, 640)
+    evf_fps: float = 30.0
+    evf_latency: float = 0.01
+    capture_size: tuple[int, int] = (6000, 4000)
+    jpeg_quality: int = 90
+    focus_latency: float = 0.3
+    shutter_latency: float = 0.15
+    transfer_rate: float = 40e6  # bytes per second
+    command_latency: float = 0.002
+
+    @classmethod
+    def from_string(cls, spec: str) -> "FakeCameraConfig":
+        """Parse `key=value,key=value`, sizes are written `WIDTHxHEIGHT`."""
+        config = cls()
+        fields = {field.name: field for field in dataclasses.fields(cls)}
+
+        for item in spec.split(","):
+            key, sep, value = item.partition("=")
+            key = key.strip()
+            if not sep:
+                continue
+
+            if key not in fields:
+                log.warning(f"Unknown fake camera option {key!r}, ignoring it")
+                continue
+
+            default = getattr(config, key)
+            if isinstance(default, tuple):
+                width, height = value.lower().split("x")
+                setattr(config, key, (int(width), int(height)))
+            else:
+                setattr(config, key, type(default)(float(value)))
+
+        return config
+
+
+@functools.lru_cache(maxsize=4)
+def _test_image(width: int, height: int, quality: int, variant: int = 0) -> bytes:
+    """A smooth, slide-like JPEG. Cached, these are expensive at full size."""
+    rng = np.random.default_rng(variant)
+    low_res = rng.random((max(height // 64, 2), max(width // 64, 2), 3)) * 255
+    img = cv2.resize(low_res, (width, height), interpolation=cv2.INTER_CUBIC)
+    ok, jpeg = cv2.imencode(
+        ".jpg", img.astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality]
+    )
+    assert ok
+    return jpeg.tobytes()
+
+
+class _MemoryStream:
+    def __init__(self):
+        self.data = bytearray()
+        self._buffer: ctypes.Array | None = None
+
+    def write(self, data: bytes):
+        self.data += data
+        self._buffer = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def pointer(self) -> int:
+        # Keep the exported copy alive until the stream changes or is released
+        if self._buffer is None:
+            self._buffer = ctypes.create_string_buffer(bytes(self.data), len(self.data))
+        return ctypes.addressof(self._buffer)
+
+    def close(self):
+        self._buffer = None
+
+
+class _FileStream:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w+b")
+
+    def write(self, data: bytes):
+        self._file.write(data)
+
+    def __len__(self):
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        self._file.close()
+
+
+@dataclass
+class _DirectoryItem:
+    name: str
+    data: bytes
+    position: int = 0
+
+
+@dataclass
+class _EvfImage:
+    stream: _MemoryStream | _FileStream
+
+
+@dataclass
+class _FakeCamera:
+    index: int
+    properties: dict[int, int | bytes] = dataclasses.field(default_factory=dict)
+    session_open: bool = False
+    last_evf_frame: float = 0.0
+    shots: int = 0
+    property_handler: Any = None
+    object_handler: Any = None
+    state_handler: Any = None
+
+
+def _property_ids():
+    # Imported late: properties.py binds `edsdk` from sdk.py, which is still
+    # being set up while this module is loaded
+    from .properties import EdsPropertyIDEnum
+
+    return EdsPropertyIDEnum
+
+
+def _default_properties() -> dict[int, int | bytes]:
+    ids = _property_ids()
+    return {
+        ids.ProductName.value: b"Canon EOS (simulated)",
+        ids.BatteryLevel.value: EdsBatteryLevel2.AC.value,
+        ids.ISOSpeed.value: ISOEnum.ISO_100.value,
+        ids.Tv.value: TvEnum.SPEED_125.value,
+        ids.Av.value: AvEnum.F5_6.value,
+        ids.SaveTo.value: 1,
+        ids.Evf_Mode.value: 0,
+        ids.Evf_OutputDevice.value: 0,
+    }
+
+
+def _handle(ref) -> int | None:
+    """The integer behind a ref, whether passed as a c_void_p or plain int."""
+    if isinstance(ref, ctypes.c_void_p):
+        return ref.value
+    return ref
+
+
+def _out(arg):
+    """The ctypes object a `ctypes.byref(...)` argument points at."""
+    return getattr(arg, "_obj", arg)
+
+
+class FakeEdsdk:
+    """
+    Drop-in replacement for the `edsdk` ctypes library.
+
+    Every public `Eds*` method mirrors the EDSDK function of the same name.
+    Counters of interest for load tests live in `stats`.
+    """
+
+    config: FakeCameraConfig
+    stats: dict[str, int]
+
+    def __init__(self, config: FakeCameraConfig | None = None):
+        self.config = config or FakeCameraConfig()
+        self.stats = {"evf_frames": 0, "shots": 0, "bytes_downloaded": 0}
+
+        self._lock = Lock()
+        self._handles: dict[int, Any] = {}
+        self._next_handle = itertools.count(0x1000)
+        self._events: list[tuple[float, int, Callable[[], Any]]] = []
+        self._event_seq = itertools.count()
+        self._initialized = False
+        self._cameras = [
+            _FakeCamera(index) for index in range(self.config.camera_count)
+        ]
+        self._camera_added_handler = None
+
+    @classmethod
+    def from_environment(cls) -> "FakeEdsdk":
+        spec = os.environ.get(ENV_VAR, "")
+        return cls(FakeCameraConfig.from_string(spec))
+
+    # Handles and events
+
+    def _new_handle(self, obj) -> int:
+        with self._lock:
+            handle = next(self._next_handle)
+            self._handles[handle] = obj
+            return handle
+
+    def _lookup(self, ref, kind: type | tuple[type, ...]):
+        obj = self._handles.get(_handle(ref))
+        return obj if isinstance(obj, kind) else None
+
+    def _queue_event(self, delay: float, callback: Callable[[], Any]):
+        with self._lock:
+            heapq.heappush(
+                self._events,
+                (time.monotonic() + delay, next(self._event_seq), callback),
+            )
+
+    def _queue_property_event(self, camera: _FakeCamera, property_id: int):
+        if camera.property_handler is not None:
+            handler = camera.property_handler
+            self._queue_event(
+                0,
+                lambda: handler(
+                    kEdsPropertyEvent_PropertyChanged, property_id, 0, None
+                ),
+            )
+
+    def _queue_object_event(
+        self, camera: _FakeCamera, delay: float, event: EdsObjectEventEnum, ref: int
+    ):
+        if camera.object_handler is not None:
+            handler = camera.object_handler
+            self._queue_event(delay, lambda: handler(event.value, ref, None))
+
+    def _queue_state_event(
+        self, camera: _FakeCamera, delay: float, event: StateEvent, param: int = 0
+    ):
+        if camera.state_handler is not None:
+            handler = camera.state_handler
+            self._queue_event(delay, lambda: handler(event.value, param, None))
+
+    def pending_events(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    # Library lifetime
+
+    def EdsInitializeSDK(self):
+        for camera in self._cameras:
+            if not camera.properties:
+                camera.properties.update(_default_properties())
+
+        self._initialized = True
+        return EDS_ERR_OK
+
+    def EdsTerminateSDK(self):
+        self._initialized = False
+        return EDS_ERR_OK
+
+    def EdsGetEvent(self, camera_ref=None, event=None):
+        """Deliver every queued callback that is due."""
+        while True:
+            with self._lock:
+                if not self._events or self._events[0][0] > time.monotonic():
+                    break
+                _, _, callback = heapq.heappop(self._events)
+
+            callback()
+
+        return EDS_ERR_OK
+
+    def EdsRelease(self, ref):
+        with self._lock:
+            obj = self._handles.pop(_handle(ref), None)
+
+        if obj is None:
+            return ErrorCode.InvalidHandle.value
+
+        if isinstance(obj, (_MemoryStream, _FileStream)):
+            obj.close()
+        return EDS_ERR_OK
+
+    # Camera discovery and sessions
+
+    def EdsSetCameraAddedHandler(self, handler, context):
+        self._camera_added_handler = handler
+        return EDS_ERR_OK
+
+    def EdsGetCameraList(self, out_list):
+        _out(out_list).value = self._new_handle(list(self._cameras))
+        return EDS_ERR_OK
+
+    def EdsGetChildCount(self, ref, out_count):
+        children = self._lookup(ref, list)
+        if children is None:
+            return ErrorCode.InvalidHandle.value
+
+        _out(out_count).value = len(children)
+        return EDS_ERR_OK
+
+    def EdsGetChildAtIndex(self, ref, index, out_child):
+        children = self._lookup(ref, list)
+        if children is None:
+            return ErrorCode.InvalidHandle.value
+        if not 0 <= index < len(children):
+            return ErrorCode.InvalidParameter.value
+
+        _out(out_child).value = self._new_handle(children[index])
+        return EDS_ERR_OK
+
+    def EdsGetDeviceInfo(self, camera_ref, out_info):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        info: EdsDeviceInfo = _out(out_info)
+        info.szPortName = f"fake:{camera.index}".encode()
+        info.szDeviceDescription = camera.properties[_property_ids().ProductName.value]
+        info.deviceSubType = 1
+        return EDS_ERR_OK
+
+    def EdsOpenSession(self, camera_ref):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        camera.session_open = True
+        return EDS_ERR_OK
+
+    def EdsCloseSession(self, camera_ref):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        camera.session_open = False
+        return EDS_ERR_OK
+
+    def EdsSetPropertyEventHandler(self, camera_ref, event, handler, context):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        camera.property_handler = handler
+        return EDS_ERR_OK
+
+    def EdsSetObjectEventHandler(self, camera_ref, event, handler, context):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        camera.object_handler = handler
+        return EDS_ERR_OK
+
+    def EdsSetCameraStateEventHandler(self, camera_ref, event, handler, context):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        camera.state_handler = handler
+        return EDS_ERR_OK
+
+    def EdsSetCapacity(self, camera_ref, capacity):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        self._queue_object_event(
+            camera, self.config.command_latency, EdsObjectEventEnum.VolumeInfoChanged, 0
+        )
+        return EDS_ERR_OK
+
+    # Properties
+
+    def EdsGetPropertySize(self, ref, property_id, param, out_type, out_size):
+        camera = self._lookup(ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        value = camera.properties.get(property_id)
+        if value is None:
+            return ErrorCode.PropertiesUnavailable.value
+
+        if isinstance(value, bytes):
+            _out(out_type).value = kEdsDataType_String
+            _out(out_size).value = len(value) + 1
+        else:
+            _out(out_type).value = kEdsDataType_UInt32
+            _out(out_size).value = ctypes.sizeof(ctypes.c_uint32)
+        return EDS_ERR_OK
+
+    def EdsGetPropertyData(self, ref, property_id, param, size, out_data):
+        camera = self._lookup(ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        value = camera.properties.get(property_id)
+        if value is None:
+            return ErrorCode.PropertiesUnavailable.value
+
+        raw = value + b"\0" if isinstance(value, bytes) else value.to_bytes(4, "little")
+        target = _out(out_data)
+        ctypes.memmove(ctypes.addressof(target), raw, min(size, len(raw)))
+        return EDS_ERR_OK
+
+    def EdsSetPropertyData(self, ref, property_id, param, size, data):
+        camera = self._lookup(ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+
+        source = _out(data)
+        raw = ctypes.string_at(ctypes.addressof(source), min(size, 4))
+        camera.properties[property_id] = int.from_bytes(raw, "little")
+
+        self._queue_property_event(camera, property_id)
+        return EDS_ERR_OK
+
+    # Commands
+
+    def EdsSendCommand(self, camera_ref, command, param):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        if camera is None:
+            return ErrorCode.InvalidHandle.value
+        if not camera.session_open:
+            return ErrorCode.SessionNotOpen.value
+
+        time.sleep(self.config.command_latency)
+
+        pressed = param if command == kEdsCameraCommand_PressShutterButton else None
+
+        if pressed == kEdsCameraCommand_ShutterButton_Halfway:
+            time.sleep(self.config.focus_latency)
+            self._queue_state_event(camera, 0, StateEvent.AfResult, 1)
+        elif (
+            pressed == kEdsCameraCommand_ShutterButton_Completely_NonAF
+            or command == kEdsCameraCommand_TakePicture
+        ):
+            self._capture(camera)
+
+        return EDS_ERR_OK
+
+    def _capture(self, camera: _FakeCamera):
+        camera.shots += 1
+        self.stats["shots"] += 1
+
+        width, height = self.config.capture_size
+        item = _DirectoryItem(
+            name=f"IMG_{camera.shots:04d}.JPG",
+            data=_test_image(width, height, self.config.jpeg_quality),
+        )
+        ref = self._new_handle(item)
+
+        self._queue_object_event(
+            camera,
+            self.config.shutter_latency,
+            EdsObjectEventEnum.DirItemRequestTransfer,
+            ref,
+        )
+
+    # Live view
+
+    def EdsCreateMemoryStream(self, size, out_stream):
+        _out(out_stream).value = self._new_handle(_MemoryStream())
+        return EDS_ERR_OK
+
+    def EdsCreateFileStream(self, path, disposition, access, out_stream):
+        path = path.decode() if isinstance(path, bytes) else path
+        try:
+            stream = _FileStream(path)
+        except OSError:
+            return ErrorCode.FileOpenError.value
+
+        _out(out_stream).value = self._new_handle(stream)
+        return EDS_ERR_OK
+
+    def EdsCreateEvfImageRef(self, stream_ref, out_image):
+        stream = self._lookup(stream_ref, (_MemoryStream, _FileStream))
+        if stream is None:
+            return ErrorCode.InvalidHandle.value
+
+        _out(out_image).value = self._new_handle(_EvfImage(stream))
+        return EDS_ERR_OK
+
+    def EdsDownloadEvfImage(self, camera_ref, image_ref):
+        camera = self._lookup(camera_ref, _FakeCamera)
+        image = self._lookup(image_ref, _EvfImage)
+        if camera is None or image is None:
+            return ErrorCode.InvalidHandle.value
+
+        ids = _property_ids()
+        evf_on = camera.properties.get(ids.Evf_Mode.value) == 1
+        to_pc = camera.properties.get(ids.Evf_OutputDevice.value, 0) & 2
+        if not (evf_on and to_pc):
+            return ErrorCode.ObjectNotready.value
+
+        # The camera only produces a new frame every 1/evf_fps
+        now = time.monotonic()
+        if now - camera.last_evf_frame < 1 / self.config.evf_fps:
+            return ErrorCode.ObjectNotready.value
+        camera.last_evf_frame = now
+
+        time.sleep(self.config.evf_latency)
+        width, height = self.config.evf_size
+        variant = self.stats["evf_frames"] % 2
+        image.stream.write(_test_image(width, height, 80, variant))
+        self.stats["evf_frames"] += 1
+        return EDS_ERR_OK
+
+    # Transfers
+
+    def EdsGetDirectoryItemInfo(self, item_ref, out_info):
+        item = self._lookup(item_ref, _DirectoryItem)
+        if item is None:
+            return ErrorCode.InvalidHandle.value
+
+        info: EdsDirectoryItemInfo = _out(out_info)
+        info.size = len(item.data)
+        info.isFolder = False
+        info.szFileName = item.name.encode()
+        info.format = kEdsImageType_Jpeg
+        info.dateTime = int(time.time())
+        return EDS_ERR_OK
+
+    def EdsDownload(self, item_ref, size, stream_ref):
+        """Transfer the next `size` bytes of the item, at `transfer_rate`."""
+        item = self._lookup(item_ref, _DirectoryItem)
+        stream = self._lookup(stream_ref, (_MemoryStream, _FileStream))
+        if item is None or stream is None:
+            return ErrorCode.InvalidHandle.value
+
+        if isinstance(size, ctypes.c_uint64):
+            size = size.value
+
+        chunk = item.data[item.position : item.position + size]
+        if len(chunk) < size:
+            return ErrorCode.InvalidLength.value
+
+        time.sleep(len(chunk) / self.config.transfer_rate)
+        stream.write(chunk)
+        item.position += len(chunk)
+        self.stats["bytes_downloaded"] += len(chunk)
+        return EDS_ERR_OK
+
+    def EdsDownloadComplete(self, item_ref):
+        item = self._lookup(item_ref, _DirectoryItem)
+        if item is None:
+            return ErrorCode.InvalidHandle.value
+
+        return EDS_ERR_OK
+
+    def EdsDownloadCancel(self, item_ref):
+        item = self._lookup(item_ref, _DirectoryItem)
+        if item is None:
+            return ErrorCode.InvalidHandle.value
+
+        item.position = 0
+        return EDS_ERR_OK
+
+    def EdsCopyData(self, in_ref, size, out_ref):
+        source = self._lookup(in_ref, _MemoryStream)
+        target = self._lookup(out_ref, (_MemoryStream, _FileStream))
+        if source is None or target is None:
+            return ErrorCode.InvalidHandle.value
+
+        target.write(bytes(source.data[:size]))
+        return EDS_ERR_OK
+
+    def EdsGetPointer(self, stream_ref, out_pointer):
+        stream = self._lookup(stream_ref, _MemoryStream)
+        if stream is None:
+            return ErrorCode.InvalidHandle.value
+
+        _out(out_pointer).value = stream.pointer()
+        return EDS_ERR_OK
+
+    def EdsGetLength(self, stream_ref, out_length):
+        stream = self._lookup(stream_ref, (_MemoryStream, _FileStream))
+        if stream is None:
+            return ErrorCode.InvalidHandle.value
+
+        _out(out_length).value = len(stream)
+        return EDS_ERR_OK
@@ -28,6 +28,8 @@ from . import (
     kEdsStateEvent_All,
 )
 from .download import _object_callback, object_event
+from .event_pump import event_pump
+from .executor import CommandPriority, sdk_command, sdk_executor
 from .object_events import EdsObjectEventEnum
 from .properties import waiting
 from .sdk import EdsCapacity
@@ -68,6 +70,7 @@ class CameraManager:
     def _edsdk_available(self):
         return edsdk is not None
 
+    @sdk_command(CommandPriority.PROPERTY)
     def initialize(self):
         if not self._edsdk_available():
             return False
@@ -79,6 +82,7 @@ class CameraManager:
             return True
         return False
 
+    @sdk_command(CommandPriority.PROPERTY)
     def terminate(self):
         if not self._edsdk_available():
             return
@@ -92,6 +96,7 @@ class CameraManager:
             self.initialized.clear()
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def get_camera_list(self):
         camera_list = EdsCameraListRef()
         err = edsdk.EdsGetCameraList(ctypes.byref(camera_list))
@@ -104,6 +109,7 @@ class CameraManager:
         return True
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def get_camera_count(self):
         if self.camera_list is None:
             if not self.get_camera_list():
@@ -118,6 +124,7 @@ class CameraManager:
         return count.value
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def get_camera(self, index=0):
         camera_ref = EdsCameraRef()
         err = edsdk.EdsGetChildAtIndex(
@@ -130,6 +137,7 @@ class CameraManager:
         return camera_ref
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def set_property_value(
         self, camera: EdsCameraRef, property_id: EdsPropertyIDEnum, value
     ):
@@ -157,7 +165,7 @@ class CameraManager:
         log.debug("All events are set up for handle")
 
         self.signal.emit(SignalName.CameraConnecting.name)
-        err = edsdk.EdsOpenSession(camera)
+        err = sdk_executor.call(CommandPriority.PROPERTY, edsdk.EdsOpenSession, camera)
 
         if err == EDS_ERR_OK:
             # Set save destination to PC (value 2 = PC only)
@@ -174,7 +182,9 @@ class CameraManager:
                 )
 
                 object_event[EdsObjectEventEnum.VolumeInfoChanged].clear()
-                err = edsdk.EdsSetCapacity(camera, capacity)
+                err = sdk_executor.call(
+                    CommandPriority.PROPERTY, edsdk.EdsSetCapacity, camera, capacity
+                )
                 if err != EDS_ERR_OK:
                     raise CameraException(err)
                 object_event[EdsObjectEventEnum.VolumeInfoChanged].wait(5)
@@ -188,9 +198,12 @@ class CameraManager:
         raise CameraException(err)
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def set_property_event_handler(self, camera: EdsCameraRef):
         global _property_handler
-        _property_handler = EdsPropertyEventHandler(_property_callback)
+        _property_handler = EdsPropertyEventHandler(
+            event_pump.track(_property_callback)
+        )
 
         err = edsdk.EdsSetPropertyEventHandler(
             camera,
@@ -203,10 +216,11 @@ class CameraManager:
             raise CameraException(err)
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def set_object_event_handler(self, camera: EdsCameraRef):
         """Set up handler for object events (like new images)."""
         global _object_handler
-        _object_handler = EdsObjectEventHandler(_object_callback)
+        _object_handler = EdsObjectEventHandler(event_pump.track(_object_callback))
 
         err = edsdk.EdsSetObjectEventHandler(
             camera,
@@ -219,10 +233,11 @@ class CameraManager:
             raise CameraException(err)
 
     @needs_sdk
+    @sdk_command(CommandPriority.PROPERTY)
     def set_state_event_handler(self, camera: EdsCameraRef):
         """Set up handler for state events (like AF results)."""
         global _state_handler
-        _state_handler = EdsStateEventHandler(_state_callback)
+        _state_handler = EdsStateEventHandler(event_pump.track(_state_callback))
 
         err = edsdk.EdsSetCameraStateEventHandler(
             camera,
@@ -7,6 +7,7 @@ from typing import Any, Callable
 log = logging.getLogger(__name__)
 
 from .err import EDS_ERR_OK, CameraException
+from .executor import CommandPriority, sdk_command
 from .prop_values import AvEnum, EdsBatteryLevel2, ISOEnum, TvEnum
 from .sdk import (
     EdsFocusInfo,
@@ -331,6 +332,7 @@ def _allocate_buffers(size, data_type):
     return buffer, buffer_size
 
 
+@sdk_command(CommandPriority.PROPERTY)
 def _extract_property_data(camera, property_id):
     """Extract property data from camera for the given property ID."""
     # First get the property size and data type
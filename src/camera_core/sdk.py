@@ -264,6 +264,18 @@ kEdsImageType_HEIF = 0x00000008
 # Object formats
 kEdsObjectFormat_CR3 = 0xB108
 
+# File stream creation
+kEdsFileCreateDisposition_CreateNew = 0
+kEdsFileCreateDisposition_CreateAlways = 1
+kEdsFileCreateDisposition_OpenExisting = 2
+kEdsFileCreateDisposition_OpenAlways = 3
+kEdsFileCreateDisposition_TruncateExsisting = 4
+
+# File stream access
+kEdsAccess_Read = 0
+kEdsAccess_Write = 1
+kEdsAccess_ReadWrite = 2
+
 # Data types
 kEdsDataType_Unknown = 0
 kEdsDataType_Bool = 1
@@ -322,6 +334,8 @@ if edsdk is not None:
     ]
     edsdk.EdsDownloadComplete.restype = EdsError
     edsdk.EdsDownloadComplete.argtypes = [EdsBaseRef]
+    edsdk.EdsDownloadCancel.restype = EdsError
+    edsdk.EdsDownloadCancel.argtypes = [EdsBaseRef]
     edsdk.EdsSetCapacity.restype = EdsError
     edsdk.EdsSetCapacity.argtypes = [EdsCameraRef, EdsCapacity]
     edsdk.EdsGetDirectoryItemInfo.restype = EdsError
@@ -333,3 +347,9 @@ if edsdk is not None:
     edsdk.EdsCopyData.argtypes = [EdsStreamRef, EdsUInt64, EdsStreamRef]
     edsdk.EdsGetEvent.restype = EdsError
     edsdk.EdsGetEvent.argtypes = [EdsCameraRef, ctypes.POINTER(EdsUInt32)]
+
+# Headless runs and load tests: swap in the simulated camera from fake_sdk.py
+if os.environ.get("SLIDESCANNER_FAKE_EDSDK"):
+    from .fake_sdk import FakeEdsdk
+
+    edsdk = FakeEdsdk.from_environment()
@@ -0,0 +1,256 @@
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from threading import Lock
+from typing import Callable
+
+import numpy as np
+from gi.repository import GObject
+
+from .camera_core.event_pump import event_pump
+from .camera_core.executor import sdk_executor
+from .common_signal import SIGNAL_ARGS, SignalName
+
+log = logging.getLogger(__name__)
+
+# The signals a capture goes through, in order. A span starts at TakePicture
+# (spacebar or auto-capture) and ends at ImageDownloaded, or fails with
+# TakePictureError (shutter cycle) or ImageDownloadFailed (download).
+CAPTURE_STAGES = (
+    SignalName.Focusing,
+    SignalName.FocusDone,
+    SignalName.ShutterDown,
+    SignalName.ShutterRelease,
+    SignalName.ImageDownloading,
+    SignalName.ImageDownloaded,
+)
+
+# Recorded by the download code once the image is on disk
+FILE_WRITTEN = "FileWritten"
+
+# From here on the camera is free and the shot only waits on its download
+HANDED_OVER = SignalName.ImageDownloading.name
+
+SUMMARY_PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class CaptureSpan:
+    """Monotonic timestamps (seconds) of the stages of a single shot."""
+
+    started: float
+    marks: dict[str, float] = field(default_factory=dict)
+    path: str | None = None
+    failed: bool = False
+    # PhotoRequest id, known once the camera has handed the image over
+    request_id: int | None = None
+
+    def durations_ms(self) -> dict[str, float]:
+        """Time from the shot being requested until each stage, in ms."""
+        return {
+            stage: (at - self.started) * 1000
+            for stage, at in sorted(self.marks.items(), key=lambda item: item[1])
+        }
+
+
+class CaptureMetrics(GObject.GObject):
+    """
+    Times every shot from the capture request to the file on disk.
+
+    Several shots can be in flight: at most one in its focus/shutter cycle,
+    and any number of earlier ones still downloading. Download signals carry
+    the id of their shot, so each finished or failed download closes its own
+    span. Stage marks arrive from whichever thread emits the signal, so all
+    state is kept under a lock.
+    `summary` is updated (and notified) whenever a shot completes.
+
+    Other parts of the capture path can add their own numbers to the export
+    with `add_diagnostics`.
+    """
+
+    spans: list[CaptureSpan]
+    _summary: str = ""
+
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+        self._open: deque[CaptureSpan] = deque()
+        self._diagnostics: dict[str, Callable[[], dict]] = {}
+        self._lock = Lock()
+
+    @GObject.Property(type=str)
+    def summary(self):
+        return self._summary
+
+    def attach(self, signal: GObject.GObject):
+        """Start timing the capture signals emitted on `signal`."""
+        signal.connect(SignalName.TakePicture.name, lambda *_: self.start())
+        signal.connect(SignalName.TakePictureError.name, lambda *_: self.fail())
+        signal.connect(
+            SignalName.ImageDownloadFailed.name,
+            lambda _, request_id: self.fail(request_id),
+        )
+
+        for stage in CAPTURE_STAGES:
+            if stage in SIGNAL_ARGS:
+                signal.connect(
+                    stage.name,
+                    lambda _, request_id, name=stage.name: self.mark(
+                        name, request_id=request_id
+                    ),
+                )
+            else:
+                signal.connect(stage.name, lambda *_, name=stage.name: self.mark(name))
+
+    def start(self, at: float | None = None):
+        with self._lock:
+            # A request during another shutter cycle is ignored by the camera too
+            if self._shooting() is None:
+                self._open.append(CaptureSpan(time.monotonic() if at is None else at))
+
+    def _shooting(self) -> CaptureSpan | None:
+        """The span still in its focus/shutter cycle, if any."""
+        if self._open and HANDED_OVER not in self._open[-1].marks:
+            return self._open[-1]
+        return None
+
+    def _downloading(self, request_id: int | None = None) -> CaptureSpan | None:
+        """
+        The span downloading the shot `request_id`, or without one the oldest
+        span the camera has handed over, as downloads are written in order.
+        """
+        for span in self._open:
+            if HANDED_OVER not in span.marks:
+                continue
+            if request_id is None or span.request_id == request_id:
+                return span
+        return None
+
+    def _close(self, span: CaptureSpan):
+        self._open.remove(span)
+        self.spans.append(span)
+
+    def mark(self, stage: str, at: float | None = None, request_id: int | None = None):
+        at = time.monotonic() if at is None else at
+
+        with self._lock:
+            if stage == SignalName.ImageDownloaded.name:
+                span = self._downloading(request_id)
+            else:
+                span = self._shooting()
+
+            if span is None:
+                return
+
+            if stage == HANDED_OVER:
+                span.request_id = request_id
+            span.marks.setdefault(stage, at)
+
+            if stage != SignalName.ImageDownloaded.name:
+                return
+
+            self._close(span)
+
+        self._update_summary()
+
+    def file_written(self, request_id: int, path: str, at: float | None = None):
+        at = time.monotonic() if at is None else at
+
+        with self._lock:
+            span = self._downloading(request_id)
+            if span is not None:
+                span.path = path
+                span.marks.setdefault(FILE_WRITTEN, at)
+
+    def fail(self, request_id: int | None = None):
+        """
+        A shot failed: the download of `request_id` if given, otherwise the
+        shot in its shutter cycle.
+        """
+        with self._lock:
+            if request_id is None:
+                span = self._shooting()
+            else:
+                span = self._downloading(request_id)
+
+            if span is None:
+                return
+
+            span.failed = True
+            self._close(span)
+
+        self._update_summary()
+
+    def percentiles(
+        self, stage: str | None = None, q: tuple[int, ...] = SUMMARY_PERCENTILES
+    ) -> dict[int, float]:
+        """
+        Percentiles (ms) of the time until `stage`, over the successful shots.
+        Defaults to the full request to downloaded span.
+        """
+        stage = stage or SignalName.ImageDownloaded.name
+
+        with self._lock:
+            samples = [
+                span.durations_ms()[stage]
+                for span in self.spans
+                if not span.failed and stage in span.marks
+            ]
+
+        if not samples:
+            return {}
+
+        return dict(zip(q, np.percentile(samples, q).tolist()))
+
+    def _update_summary(self):
+        with self._lock:
+            shots = len(self.spans)
+            failed = sum(span.failed for span in self.spans)
+
+        p = self.percentiles()
+        if not p:
+            self._summary = f"{shots} shots, {failed} failed"
+        else:
+            self._summary = (
+                "Capture "
+                + " ".join(f"p{q} {ms:.0f}ms" for q, ms in p.items())
+                + f" ({shots} shots, {failed} failed)"
+            )
+
+        self.notify("summary")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = [
+                asdict(span) | {"stages_ms": span.durations_ms()} for span in self.spans
+            ]
+
+        stages = [stage.name for stage in CAPTURE_STAGES] + [FILE_WRITTEN]
+        return {
+            "spans": spans,
+            "percentiles_ms": {
+                stage: {f"p{q}": ms for q, ms in self.percentiles(stage).items()}
+                for stage in stages
+            },
+            # How long camera events waited for EdsGetEvent
+            "event_delivery_ms": {
+                f"p{q}": ms for q, ms in event_pump.latency_percentiles().items()
+            },
+            # How long SDK commands queued behind others, per priority
+            "sdk_queue_wait_ms": {
+                priority: {f"p{q}": ms for q, ms in p.items()}
+                for priority, p in sdk_executor.wait_percentiles().items()
+            },
+        } | {name: provider() for name, provider in self._diagnostics.items()}
+
+    def add_diagnostics(self, name: str, provider: Callable[[], dict]):
+        """Export `provider()` under `name` along with the capture timings."""
+        self._diagnostics[name] = provider
+
+    def export_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+        log.info(f"Exported capture metrics to {path}")
@@ -1,5 +1,7 @@
 from enum import Enum, auto
 
+from gi.repository import GObject
+
 
 class SignalName(Enum):
     CameraDisconnected = auto()
@@ -19,3 +21,21 @@ class SignalName(Enum):
     ShutterRelease = auto()
     ImageDownloading = auto()
     ImageDownloaded = auto()
+    ImageDownloadFailed = auto()
+
+
+# Signals about one particular shot pass its PhotoRequest id along, several
+# shots can be downloading at once
+SIGNAL_ARGS: dict[SignalName, tuple[type, ...]] = {
+    SignalName.ImageDownloading: (int,),
+    SignalName.ImageDownloaded: (int,),
+    SignalName.ImageDownloadFailed: (int,),
+}
+
+
+def signal_definitions() -> dict:
+    """`__gsignals__` declaring every SignalName."""
+    return {
+        sig.name: (GObject.SignalFlags.RUN_FIRST, None, SIGNAL_ARGS.get(sig, ()))
+        for sig in SignalName
+    }
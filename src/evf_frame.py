@@ -0,0 +1,93 @@
+import time
+from threading import RLock
+
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = 64
+
+# Let libjpeg do most of the downscaling (DCT scaling) when all we need is the
+# thumbnail. EVF frames are around 1000px wide, 1/8 still leaves more than
+# THUMBNAIL_SIZE pixels to resample from.
+THUMBNAIL_DECODE_FLAG = cv2.IMREAD_REDUCED_GRAYSCALE_8
+
+
+class EvfFrame:
+    """
+    A single live view frame as it came off the camera.
+
+    Holds the raw EVF JPEG along with lazily decoded forms of it. Each form is
+    computed at most once, on whichever thread asks for it first, and then
+    shared between the display, zebra overlay and auto-capture consumers.
+
+    The thumbnail always comes from its own reduced-resolution decode, even
+    when the display has already decoded the full frame. Shrinking that
+    decode would be a little cheaper, but gives slightly different pixels,
+    and stability decisions must not depend on which thread got there first.
+    """
+
+    data: bytes
+    timestamp: float
+
+    def __init__(self, data: bytes, timestamp: float | None = None):
+        """
+        Args:
+            data: Raw EVF JPEG bytes
+            timestamp: Monotonic time the frame was acquired, defaults to now
+        """
+        self.data = data
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+
+        self._lock = RLock()
+        self._thumbnail_lock = RLock()
+        self._rgb: np.ndarray | None = None
+        self._gray: np.ndarray | None = None
+        self._thumbnail: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Full resolution RGB image, (h, w, 3) uint8. Empty if undecodable."""
+        with self._lock:
+            if self._rgb is None:
+                bgr = cv2.imdecode(np.frombuffer(self.data, np.uint8), cv2.IMREAD_COLOR)
+                if bgr is None:
+                    self._rgb = np.array([], dtype=np.uint8)
+                else:
+                    self._rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+            return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Full resolution grayscale image, derived from the RGB decode."""
+        with self._lock:
+            if self._gray is None:
+                rgb = self.rgb
+                if rgb.size == 0:
+                    self._gray = rgb
+                else:
+                    self._gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+
+            return self._gray
+
+    @property
+    def thumbnail(self) -> np.ndarray:
+        """Small grayscale image used for stability analysis."""
+        with self._thumbnail_lock:
+            if self._thumbnail is None:
+                gray = cv2.imdecode(
+                    np.frombuffer(self.data, np.uint8), THUMBNAIL_DECODE_FLAG
+                )
+                if gray is None or gray.size == 0:
+                    self._thumbnail = np.array([], dtype=np.uint8)
+                else:
+                    self._thumbnail = cv2.resize(
+                        gray,
+                        (THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                        interpolation=cv2.INTER_AREA,
+                    )
+
+            return self._thumbnail
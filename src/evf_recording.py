@@ -0,0 +1,246 @@
+"""
+Record and replay live view (EVF) streams.
+
+A recording is an append-only file: an 8 byte magic header followed by
+length-prefixed records. Every record starts with
+
+    kind      u8   FRAME (EVF JPEG) or PROPERTY (property change)
+    timestamp u64  nanoseconds since the recording started
+    length    u32  payload size in bytes
+
+followed by the payload. A PROPERTY payload is the property id and its new
+value as two little-endian u32. Because records are only ever appended, a
+recording cut short by a crash is still readable up to its last complete
+record.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+from enum import IntEnum
+from threading import Lock
+from typing import BinaryIO, Callable, Iterator, NamedTuple
+
+from .camera_core.err import CameraException, ErrorCode
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"EVFREC\x00\x01"
+RECORD_HEADER = struct.Struct("<BQI")
+PROPERTY_PAYLOAD = struct.Struct("<II")
+
+
+class RecordKind(IntEnum):
+    Frame = 1
+    Property = 2
+
+
+class EvfRecord(NamedTuple):
+    kind: RecordKind
+    timestamp_ns: int
+    payload: memoryview
+
+
+class EvfRecorder:
+    """
+    Appends EVF frames and property changes to a recording file.
+
+    When the file already holds a recording, the new records carry on from
+    its last timestamp, so a replay goes from one session straight into the
+    next instead of bursting through it.
+    """
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        last_timestamp_ns = self._resume(path)
+        # Unbuffered, so whatever was recorded survives the app going down
+        self._file: BinaryIO = open(path, "ab", buffering=0)
+
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+        self._start = time.monotonic_ns() - last_timestamp_ns
+
+    @staticmethod
+    def _resume(path: str) -> int:
+        """
+        The last timestamp of an existing recording at `path`, 0 if there is
+        none. A record cut short by a crash is dropped, as anything appended
+        after it could never be read.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return 0
+
+        last_timestamp_ns = 0
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an EVF recording")
+
+            end = f.tell()
+            size = os.fstat(f.fileno()).st_size
+            while end + RECORD_HEADER.size <= size:
+                _, timestamp_ns, length = RECORD_HEADER.unpack(
+                    f.read(RECORD_HEADER.size)
+                )
+                if end + RECORD_HEADER.size + length > size:
+                    break
+
+                f.seek(length, os.SEEK_CUR)
+                end += RECORD_HEADER.size + length
+                last_timestamp_ns = timestamp_ns
+
+        if end < size:
+            log.warning(f"{path} ends in a truncated record, dropping it")
+            os.truncate(path, end)
+
+        return last_timestamp_ns
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _write(self, kind: RecordKind, payload: bytes, timestamp_ns: int | None):
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns() - self._start
+
+        with self._lock:
+            if self._file.closed:
+                return
+
+            self._file.write(RECORD_HEADER.pack(kind, timestamp_ns, len(payload)))
+            self._file.write(payload)
+
+    def write_frame(self, data: bytes, timestamp_ns: int | None = None):
+        self._write(RecordKind.Frame, data, timestamp_ns)
+
+    def write_property(
+        self, property_id: int, value: int, timestamp_ns: int | None = None
+    ):
+        self._write(
+            RecordKind.Property,
+            PROPERTY_PAYLOAD.pack(property_id, value & 0xFFFFFFFF),
+            timestamp_ns,
+        )
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class EvfRecording:
+    """
+    A memory-mapped recording.
+
+    Frame payloads are handed out as memoryviews into the mapping, so walking
+    a recording never copies frame data until a consumer asks for bytes.
+    """
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[: len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an EVF recording")
+
+        self._view = memoryview(self._map)
+
+    def __iter__(self) -> Iterator[EvfRecord]:
+        offset = len(MAGIC)
+        end = len(self._view)
+
+        while offset + RECORD_HEADER.size <= end:
+            kind, timestamp_ns, length = RECORD_HEADER.unpack_from(self._view, offset)
+            offset += RECORD_HEADER.size
+
+            if offset + length > end:
+                log.warning(f"{self.path} ends in a truncated record, ignoring it")
+                return
+
+            yield EvfRecord(
+                RecordKind(kind), timestamp_ns, self._view[offset : offset + length]
+            )
+            offset += length
+
+    def frames(self) -> Iterator[EvfRecord]:
+        return (record for record in self if record.kind == RecordKind.Frame)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+
+class EvfReplaySource:
+    """
+    Stands in for `Camera.download_evf_image` by replaying a recording.
+
+    In realtime mode frames come out with their original spacing, otherwise
+    as fast as they are asked for. Property records are passed to
+    `on_property` as they are reached. Once the recording runs out the source
+    either loops or reports EVF-not-ready, just like a camera with no new
+    frame would.
+    """
+
+    realtime: bool
+    loop: bool
+
+    def __init__(
+        self,
+        recording: EvfRecording,
+        realtime: bool = True,
+        loop: bool = False,
+        on_property: Callable[[int, int], None] | None = None,
+    ):
+        self.recording = recording
+        self.realtime = realtime
+        self.loop = loop
+        self.on_property = on_property
+        self.frames_replayed = 0
+        self._lock = Lock()
+        self._rewind()
+
+    def _rewind(self):
+        self._records = iter(self.recording)
+        self._start: int | None = None
+        self._pass_frames = 0
+
+    def download_evf_image(self) -> bytes:
+        with self._lock:
+            while True:
+                record = next(self._records, None)
+
+                if record is None:
+                    # Looping over a recording without frames would never
+                    # return
+                    if not self.loop or self._pass_frames == 0:
+                        raise CameraException(ErrorCode.ObjectNotready.value)
+                    self._rewind()
+                    continue
+
+                if self._start is None:
+                    self._start = time.monotonic_ns() - record.timestamp_ns
+
+                if self.realtime:
+                    delay = self._start + record.timestamp_ns - time.monotonic_ns()
+                    if delay > 0:
+                        time.sleep(delay / 1e9)
+
+                if record.kind == RecordKind.Property:
+                    if self.on_property is not None:
+                        self.on_property(*PROPERTY_PAYLOAD.unpack(record.payload))
+                    continue
+
+                self.frames_replayed += 1
+                self._pass_frames += 1
+                return bytes(record.payload)
@@ -1,5 +1,6 @@
 import io
 import logging
+import re
 import subprocess
 from typing import Optional
 
@@ -7,14 +8,41 @@ import piexif
 from PIL import Image
 from PIL.ExifTags import TAGS
 
-from .picture import CassetteItem
+from .exiftool import ExifTool, ExifToolError, exiftool_command
+from .picture import CaptureContext
 
 log = logging.getLogger(__name__)
 
+JPEG_SOI = b"\xff\xd8\xff"
+
+# Formats tagged on disk by exiftool or an XMP sidecar, never read into memory
+EXIFTOOL_FORMATS = (0x00000006, 0xB108)  # CR2, CR3
+SIDECAR_FORMATS = (0x00000002, 0x00000004)  # CRW, older RAW
+RAW_FORMATS = EXIFTOOL_FORMATS + SIDECAR_FORMATS
+
+# Long running exiftool owned by the application, see set_exiftool. Without
+# one every CR3 pays for a fresh exiftool process.
+_exiftool: ExifTool | None = None
+
+
+def set_exiftool(tool: ExifTool | None):
+    global _exiftool
+    _exiftool = tool
+
+
+def _run_exiftool(args: list[str]) -> str:
+    if _exiftool is not None:
+        return _exiftool.execute(*args)
+
+    result = subprocess.run(
+        [*exiftool_command(), *args], capture_output=True, text=True
+    )
+    return result.stdout + result.stderr
+
 
 def add_metadata_to_image(
     image_data: bytes,
-    cassette_item: CassetteItem,
+    cassette_item: CaptureContext,
     image_format: int | None = None,
     filepath: str | None = None,
 ) -> bytes:
@@ -25,12 +53,16 @@ def add_metadata_to_image(
 
     Args:
         image_data: Raw image data as bytes
-        cassette_item: CassetteItem containing metadata to add
+        cassette_item: CaptureContext containing metadata to add
         image_format: Image format code from camera SDK (see format_to_extension in camera.py)
         filepath: Full path to where the image will be saved (needed for XMP sidecar creation)
 
     Returns:
-        Image data with metadata added, or original data if metadata writing fails
+        Image data with metadata added, or the original data for RAW formats
+        (tagged on disk, see `tag_raw_file`) and when HEIF tagging fails
+
+    Raises:
+        Exception: When a JPEG cannot be tagged, so the caller can retry
     """
     log.debug("METADATA TO ADD TO IMAGE:")
     log.debug(f"  Date: {cassette_item.date}")
@@ -56,14 +88,8 @@ def add_metadata_to_image(
             log.warning("Unknown image format, returning original data")
             return image_data
 
-    # Handle RAW formats based on their EXIF support
-    if image_format in [0x00000006]:  # CR2 - can be handled by PIL
-        return _add_embedded_metadata(image_data, cassette_item, image_format)
-    elif image_format in [0xB108, 0x0000B108]:  # CR3 - use exiftool
-        _update_cr3_metadata(image_data, cassette_item, filepath)
-        return image_data
-    elif image_format in [0x00000002, 0x00000004]:  # CRW, older RAW - use XMP sidecar
-        _create_xmp_sidecar(image_data, cassette_item, filepath)
+    if image_format in RAW_FORMATS:
+        tag_raw_file(filepath, cassette_item, image_format)
         return image_data
 
     # Handle JPEG and HEIF with embedded metadata
@@ -75,24 +101,32 @@ def add_metadata_to_image(
     return image_data
 
 
-def _update_cr3_metadata(
-    image_data: bytes,
-    cassette_item: CassetteItem,
+def tag_raw_file(
+    filepath: str | None, cassette_item: CaptureContext, image_format: int
+) -> None:
+    """
+    Tag a RAW file where it lies: CR2/CR3 in place with exiftool, other RAW
+    formats (and CR2/CR3 when exiftool fails) with an XMP sidecar. Only the
+    path is needed, the image itself is never read.
+
+    Raises:
+        OSError: When not even the sidecar could be written
+    """
+    if image_format in EXIFTOOL_FORMATS:
+        _update_raw_metadata(cassette_item, filepath)
+    else:
+        _create_xmp_sidecar(cassette_item, filepath)
+
+
+def _update_raw_metadata(
+    cassette_item: CaptureContext,
     filepath: str | None = None,
 ) -> None:
-    """Update CR3 metadata using exiftool subprocess."""
-    log.debug("Updating CR3 metadata using exiftool")
+    """Update CR2/CR3 metadata using exiftool."""
+    log.debug("Updating RAW metadata using exiftool")
 
     if not filepath:
-        log.error("No filepath provided for CR3 metadata update")
-        return
-
-    try:
-        # Check if exiftool is available
-        subprocess.run(["exiftool", "-ver"], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        log.warning("exiftool not available, creating XMP sidecar instead")
-        _create_xmp_sidecar(image_data, cassette_item, filepath)
+        log.error("No filepath provided for RAW metadata update")
         return
 
     # Prepare metadata for exiftool
@@ -101,12 +135,12 @@ def _update_cr3_metadata(
         if cassette_item.date
         else ""
     )
-    description = cassette_item.label or ""
+    # exiftool takes one argument per line
+    description = (cassette_item.label or "").replace("\n", " ")
     cassette = f"Cassette: {cassette_item.name}" if cassette_item.name else ""
 
     # Build exiftool command
-    cmd = [
-        "exiftool",
+    args = [
         "-overwrite_original",
         f"-DateTimeOriginal={date_str}",
         f"-CreateDate={date_str}",
@@ -118,29 +152,27 @@ def _update_cr3_metadata(
         filepath,
     ]
 
-    log.debug(f"Running exiftool command: {' '.join(cmd)}")
+    log.debug(f"Running exiftool command: {' '.join(args)}")
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        log.debug(f"exiftool return code: {result.returncode}")
-        log.debug(f"exiftool stdout: {result.stdout}")
-        if result.stderr:
-            log.debug(f"exiftool stderr: {result.stderr}")
-
-        if result.returncode == 0:
-            log.debug(f"CR3 metadata updated successfully: {filepath}")
-        else:
-            log.error(f"exiftool failed: {result.stderr}")
-            # Fallback to XMP sidecar
-            _create_xmp_sidecar(image_data, cassette_item, filepath)
-    except Exception as e:
-        log.error(f"Failed to update CR3 metadata: {e}")
+        output = _run_exiftool(args)
+    except (OSError, ExifToolError) as e:
+        log.warning(f"exiftool not available ({e}), creating XMP sidecar instead")
+        _create_xmp_sidecar(cassette_item, filepath)
+        return
+
+    log.debug(f"exiftool output: {output}")
+
+    if re.search(r"\b[1-9]\d* image files? updated", output):
+        log.debug(f"RAW metadata updated successfully: {filepath}")
+    else:
+        log.error(f"exiftool failed: {output}")
         # Fallback to XMP sidecar
-        _create_xmp_sidecar(image_data, cassette_item, filepath)
+        _create_xmp_sidecar(cassette_item, filepath)
 
 
 def _create_xmp_sidecar(
-    image_data: bytes, cassette_item: CassetteItem, filepath: str | None = None
+    cassette_item: CaptureContext, filepath: str | None = None
 ) -> None:
     """Create XMP sidecar file for RAW files that don't support embedded EXIF (CRW, older RAW)."""
     log.debug(
@@ -188,19 +220,95 @@ def _create_xmp_sidecar(
 </x:xmpmeta>
 <?xpacket end="w"?>"""
 
+    # Failures propagate, the metadata writer retries them
+    with open(xmp_filepath, "w", encoding="utf-8") as f:
+        f.write(xmp_content)
+    log.debug(f"XMP sidecar created: {xmp_filepath}")
+
+
+def _apply_piexif_tags(exif_dict: dict, cassette_item: CaptureContext):
+    """Write the capture context into a piexif style EXIF dict."""
+    if cassette_item.date:
+        date_str = cassette_item.date.strftime("%Y:%m:%d %H:%M:%S")
+        exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_str
+        exif_dict["0th"][piexif.ImageIFD.DateTime] = date_str
+
+    if cassette_item.label:
+        exif_dict["0th"][piexif.ImageIFD.ImageDescription] = cassette_item.label
+
+    if cassette_item.name:
+        exif_dict["0th"][piexif.ImageIFD.Copyright] = f"Cassette: {cassette_item.name}"
+
+    if cassette_item.rating:
+        exif_dict["0th"][piexif.ImageIFD.Rating] = cassette_item.rating
+
+
+def _empty_exif() -> dict:
+    return {"0th": {}, "Exif": {}, "1st": {}, "thumbnail": None}
+
+
+def _dump_exif(exif_dict: dict) -> bytes:
+    """
+    piexif.dump, minus the tags it cannot write back. Some camera bodies
+    write EXIF that piexif loads but refuses to dump, e.g. an int SceneType
+    or malformed MakerNote entries.
+    """
+    try:
+        return piexif.dump(exif_dict)
+    except Exception as e:
+        log.debug(f"Dropping camera EXIF tags piexif cannot write: {e}")
+
+    for ifd in ("0th", "Exif", "GPS", "Interop", "1st"):
+        tags = exif_dict.get(ifd) or {}
+        for tag, value in list(tags.items()):
+            try:
+                piexif.dump({ifd: {tag: value}})
+            except Exception:
+                log.debug(f"Dropping EXIF tag {tag} from {ifd}: {value!r:.40}")
+                del tags[tag]
+
+    return piexif.dump(exif_dict)
+
+
+def _insert_jpeg_exif(image_data: bytes, cassette_item: CaptureContext) -> bytes:
+    """
+    Tag a JPEG without touching its image data.
+
+    Only the EXIF (APP1) segment is parsed and replaced, the compressed scan
+    is copied through as is. That keeps the camera's JPEG bit for bit and
+    costs next to nothing compared to decoding and re-encoding the image.
+    """
+    try:
+        exif_dict = piexif.load(image_data)
+    except Exception as e:
+        log.debug(e)
+        exif_dict = _empty_exif()
+
+    _apply_piexif_tags(exif_dict, cassette_item)
+
     try:
-        # Write XMP file
-        with open(xmp_filepath, "w", encoding="utf-8") as f:
-            f.write(xmp_content)
-        log.debug(f"XMP sidecar created: {xmp_filepath}")
+        exif = _dump_exif(exif_dict)
     except Exception as e:
-        log.error(f"Failed to create XMP sidecar: {e}")
+        # Retrying would fail the same way, keep the tags and lose the rest
+        log.warning(f"Replacing camera EXIF that cannot be written back: {e}")
+        exif_dict = _empty_exif()
+        _apply_piexif_tags(exif_dict, cassette_item)
+        exif = piexif.dump(exif_dict)
+
+    output = io.BytesIO()
+    piexif.insert(exif, image_data, output)
+    log.debug("EXIF metadata inserted losslessly")
+    return output.getvalue()
 
 
 def _add_embedded_metadata(
-    image_data: bytes, cassette_item: CassetteItem, image_format: int
+    image_data: bytes, cassette_item: CaptureContext, image_format: int
 ) -> bytes:
-    """Add metadata to JPEG/HEIF/CR2/CR3 files using PIL/Pillow and piexif."""
+    """Add metadata to JPEG/HEIF files using piexif or PIL/Pillow."""
+    if image_data.startswith(JPEG_SOI):
+        # Lossless and cheap, let failures reach the caller to retry
+        return _insert_jpeg_exif(image_data, cassette_item)
+
     try:
         # Try to use PIL/Pillow if available in the environment
         try:
@@ -271,24 +379,7 @@ def _add_embedded_metadata(
                 exif_dict = {"0th": {}, "Exif": {}, "1st": {}, "thumbnail": None}
 
             # Add metadata
-            if cassette_item.date:
-                date_str = cassette_item.date.strftime("%Y:%m:%d %H:%M:%S")
-                if hasattr(piexif.ExifIFD, "DateTimeOriginal"):
-                    exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_str
-                if hasattr(piexif.ImageIFD, "DateTime"):
-                    exif_dict["0th"][piexif.ImageIFD.DateTime] = date_str
-
-            if cassette_item.label:
-                if hasattr(piexif.ImageIFD, "ImageDescription"):
-                    exif_dict["0th"][piexif.ImageIFD.ImageDescription] = (
-                        cassette_item.label
-                    )
-
-            if cassette_item.name:
-                if hasattr(piexif.ImageIFD, "Copyright"):
-                    exif_dict["0th"][piexif.ImageIFD.Copyright] = (
-                        f"Cassette: {cassette_item.name}"
-                    )
+            _apply_piexif_tags(exif_dict, cassette_item)
 
             # Convert and save
             exif_bytes = piexif.dump(exif_dict)
@@ -0,0 +1,165 @@
+import itertools
+import logging
+import os
+import select
+import shlex
+import subprocess
+import time
+from threading import Lock
+
+log = logging.getLogger(__name__)
+
+# Command used to start exiftool, e.g. a stand-in script for tests and benches
+EXIFTOOL_ENV_VAR = "SLIDESCANNER_EXIFTOOL"
+
+
+class ExifToolError(Exception):
+    pass
+
+
+def exiftool_command() -> list[str]:
+    return shlex.split(os.environ.get(EXIFTOOL_ENV_VAR, "exiftool"))
+
+
+class ExifTool:
+    """
+    A long running `exiftool -stay_open True -@ -` process.
+
+    Starting exiftool costs a few hundred milliseconds of Perl start-up, so
+    rather than paying that for every image we keep one process around and
+    feed it commands over stdin. Each command is a list of arguments, one per
+    line, followed by `-execute<n>`; exiftool answers with its output and a
+    `{ready<n>}` marker.
+
+    The process is started on first use and restarted whenever it has died or
+    stops answering, commands are serialised with a lock.
+    """
+
+    command: list[str]
+    timeout: float
+    restarts: int
+
+    def __init__(self, command: list[str] | None = None, timeout: float = 10.0):
+        """
+        Args:
+            command: How to start exiftool, defaults to $SLIDESCANNER_EXIFTOOL
+                or plain `exiftool`
+            timeout: Seconds a single command may take before the process is
+                considered hung and restarted
+        """
+        self.command = command or exiftool_command()
+        self.timeout = timeout
+        self.restarts = 0
+
+        self._process: subprocess.Popen | None = None
+        self._lock = Lock()
+        self._sequence = itertools.count(1)
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        if self.running:
+            return
+
+        if self._process is not None:
+            log.warning(f"exiftool exited ({self._process.returncode}), restarting")
+            self.restarts += 1
+
+        log.info(f"Starting {' '.join(self.command)} in stay_open mode")
+        self._process = subprocess.Popen(
+            [*self.command, "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # Errors are interleaved with the output, which is where we look
+            # for them anyway
+            stderr=subprocess.STDOUT,
+        )
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+
+        try:
+            if process.poll() is None:
+                assert process.stdin is not None
+                process.stdin.write(b"-stay_open\nFalse\n")
+                process.stdin.flush()
+                process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+    def execute(self, *args: str) -> str:
+        """
+        Run one exiftool command and return its output.
+
+        A dead or hung process is restarted and the command retried once.
+        """
+        with self._lock:
+            try:
+                return self._execute(args)
+            except (OSError, ExifToolError) as e:
+                log.warning(f"exiftool did not answer ({e}), restarting it")
+                self._restart()
+                return self._execute(args)
+
+    def ping(self) -> bool:
+        """Health check: is the process up and answering?"""
+        try:
+            return bool(self.execute("-ver").strip())
+        except (OSError, ExifToolError):
+            return False
+
+    def _restart(self):
+        self.restarts += 1
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        self._start()
+
+    def _execute(self, args: tuple[str, ...]) -> str:
+        self._start()
+        assert self._process is not None
+        assert self._process.stdin is not None and self._process.stdout is not None
+
+        for arg in args:
+            if "\n" in arg:
+                raise ValueError(f"exiftool arguments cannot span lines: {arg!r}")
+
+        sequence = next(self._sequence)
+        command = "".join(f"{arg}\n" for arg in args) + f"-execute{sequence}\n"
+        self._process.stdin.write(command.encode())
+        self._process.stdin.flush()
+
+        marker = f"{{ready{sequence}}}".encode()
+        output = bytearray()
+        deadline = time.monotonic() + self.timeout
+        fd = self._process.stdout.fileno()
+
+        while marker not in output:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ExifToolError(f"timed out after {self.timeout}s")
+
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise ExifToolError("process exited")
+            output += chunk
+
+        return output[: output.index(marker)].decode(errors="replace")
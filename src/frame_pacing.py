@@ -0,0 +1,260 @@
+import contextlib
+import time
+from collections import deque
+from threading import Event, Lock
+
+from gi.repository import GObject
+
+from .camera_core.err import CameraException, ErrorCode
+from .common_signal import SignalName
+
+# Errors the camera returns while it has no fresh EVF frame for us yet. These
+# are expected and should slow us down rather than be treated as failures.
+EVF_NOT_READY_ERRORS = (
+    ErrorCode.ObjectNotready.value,
+    ErrorCode.DeviceBusy.value,
+    ErrorCode.PtpDeviceBusy.value,
+)
+
+
+def is_evf_not_ready(e: CameraException) -> bool:
+    """Check whether a camera exception just means 'no frame available yet'."""
+    return getattr(e, "err_code", None) in EVF_NOT_READY_ERRORS
+
+
+class FramePacer:
+    """
+    Paces a frame loop to a target frame rate.
+
+    Rather than sleeping a fixed amount after every frame, the pacer measures
+    how long the frame actually took and only sleeps for whatever is left of
+    the frame interval. When the camera reports that no frame is ready it
+    backs off exponentially, and snaps back to the target rate as soon as a
+    frame comes through.
+    """
+
+    target_fps: float
+    max_backoff: float
+
+    def __init__(
+        self,
+        target_fps: float = 30.0,
+        max_backoff: float = 0.5,
+        max_pause: float = 5.0,
+        window: int = 30,
+        smoothing: float = 0.2,
+    ):
+        """
+        Args:
+            target_fps: Frame rate we try to reach
+            max_backoff: Upper bound (seconds) on the not-ready back off
+            max_pause: Longest (seconds) a paused loop waits before fetching a
+                frame anyway, in case nobody resumes it
+            window: Number of recent frames used to compute the achieved fps
+            smoothing: Weight of the newest sample in the stage time averages
+        """
+        self.target_fps = target_fps
+        self.max_backoff = max_backoff
+        self.max_pause = max_pause
+        self.smoothing = smoothing
+
+        self._frame_times: deque[float] = deque(maxlen=window)
+        # Written by every pipeline thread, read for the diagnostics
+        self._stage_timings: dict[str, float] = {}
+        self._stage_lock = Lock()
+        self._frame_start: float | None = None
+        self._backoff = 0.0
+        self._throttle_fps: float | None = None
+        self._rate_changed = Event()
+
+    @property
+    def frame_interval(self) -> float:
+        fps = self.target_fps if self._throttle_fps is None else self._throttle_fps
+        if fps <= 0:
+            return 0.0
+        return 1.0 / fps
+
+    @property
+    def paused(self) -> bool:
+        return self._throttle_fps == 0
+
+    @property
+    def throttled(self) -> bool:
+        return self._throttle_fps is not None
+
+    def throttle(self, fps: float):
+        """Run at `fps` (0 pauses) instead of the target until `unthrottle`."""
+        self._throttle_fps = fps
+        self._rate_changed.set()
+
+    def unthrottle(self):
+        self._throttle_fps = None
+        self._rate_changed.set()
+
+    @property
+    def achieved_fps(self) -> float:
+        """Frame rate over the last `window` completed frames."""
+        if len(self._frame_times) < 2:
+            return 0.0
+
+        elapsed = self._frame_times[-1] - self._frame_times[0]
+        if elapsed <= 0:
+            return 0.0
+
+        return (len(self._frame_times) - 1) / elapsed
+
+    @property
+    def stage_timings(self) -> dict[str, float]:
+        """Smoothed duration of each named stage, in milliseconds."""
+        with self._stage_lock:
+            timings = list(self._stage_timings.items())
+
+        return {name: seconds * 1000 for name, seconds in timings}
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def record_stage(self, name: str, seconds: float):
+        with self._stage_lock:
+            previous = self._stage_timings.get(name)
+            if previous is None:
+                self._stage_timings[name] = seconds
+            else:
+                self._stage_timings[name] = previous + self.smoothing * (
+                    seconds - previous
+                )
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time the body of the `with` block as the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def frame_done(self):
+        """Mark the current frame as successfully delivered."""
+        now = time.perf_counter()
+        self._frame_times.append(now)
+        self._backoff = 0.0
+
+        if self._frame_start is not None:
+            self.record_stage("frame", now - self._frame_start)
+
+    def not_ready(self):
+        """The camera had no frame for us, back off before asking again."""
+        if self._backoff == 0.0:
+            self._backoff = max(self.frame_interval, 0.005)
+        else:
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    def time_until_next_frame(self) -> float:
+        spent = 0.0
+        if self._frame_start is not None:
+            spent = time.perf_counter() - self._frame_start
+
+        if self.paused:
+            return max(0.0, self.max_pause - spent)
+
+        if self._backoff:
+            return self._backoff
+
+        return max(0.0, self.frame_interval - spent)
+
+    def wait(self):
+        """
+        Sleep for whatever is left of this frame's budget, re-evaluated
+        whenever the rate is throttled or restored in the meantime.
+        """
+        while (delay := self.time_until_next_frame()) > 0:
+            if not self._rate_changed.wait(delay):
+                return
+            self._rate_changed.clear()
+
+
+class CaptureThrottle:
+    """
+    Keeps a live view loop out of the camera's way while it takes pictures.
+
+    EVF downloads share the camera's command channel and the USB link with
+    the capture itself. From Focusing until the camera hands the image over
+    the loop is paused, after that it runs at `transfer_fps` until every shot
+    in flight has been downloaded or failed to, then at its full rate again.
+
+    Shots are followed by request id once handed over, so the download of a
+    shot from before a `reset` never counts against the shots after it.
+    """
+
+    pacer: FramePacer
+    transfer_fps: float
+
+    def __init__(self, pacer: FramePacer, transfer_fps: float = 5.0):
+        self.pacer = pacer
+        self.transfer_fps = transfer_fps
+
+        self._downloading: set[int] = set()
+        self._shooting = False
+        self._lock = Lock()
+
+    def attach(self, signal: GObject.GObject):
+        signal.connect(SignalName.Focusing.name, lambda *_: self.shot_started())
+        signal.connect(
+            SignalName.ImageDownloading.name,
+            lambda _, request_id: self.shot_handed_over(request_id),
+        )
+        signal.connect(
+            SignalName.ImageDownloaded.name,
+            lambda _, request_id: self.shot_done(request_id),
+        )
+        # A failed download is just another shot finished, only a failed
+        # shutter cycle ends the current one
+        signal.connect(
+            SignalName.ImageDownloadFailed.name,
+            lambda _, request_id: self.shot_done(request_id),
+        )
+        signal.connect(SignalName.TakePictureError.name, lambda *_: self.shot_failed())
+
+    def shot_started(self):
+        with self._lock:
+            self._shooting = True
+            self.pacer.throttle(0)
+
+    def shot_handed_over(self, request_id: int):
+        with self._lock:
+            self._shooting = False
+            self._downloading.add(request_id)
+            self.pacer.throttle(self.transfer_fps)
+
+    def shot_done(self, request_id: int):
+        with self._lock:
+            if request_id not in self._downloading:
+                return
+
+            self._downloading.remove(request_id)
+            self._update()
+
+    def shot_failed(self):
+        """The shot in its focus/shutter cycle failed."""
+        with self._lock:
+            if not self._shooting:
+                return
+
+            self._shooting = False
+            self._update()
+
+    def reset(self):
+        """Forget every shot in flight and let the loop run at its full rate."""
+        with self._lock:
+            self._downloading.clear()
+            self._shooting = False
+            self.pacer.unthrottle()
+
+    def _update(self):
+        if self._shooting:
+            return
+
+        if self._downloading:
+            self.pacer.throttle(self.transfer_fps)
+        else:
+            self.pacer.unthrottle()
@@ -0,0 +1,133 @@
+from collections import deque
+from threading import Condition, Lock
+from typing import Callable, Generic, TypeVar
+
+from gi.repository import GLib
+
+T = TypeVar("T")
+
+
+class LatestFrameQueue(Generic[T]):
+    """
+    A bounded queue between two pipeline stages where the newest frame wins.
+
+    When the consumer falls behind, the oldest queued frame is dropped to make
+    room for the new one, so a slow stage never blocks the producer and the
+    queue never grows past `maxsize`. Dropped frames are counted.
+    """
+
+    name: str
+    maxsize: int
+    dropped: int
+    delivered: int
+
+    def __init__(self, name: str, maxsize: int = 1):
+        self.name = name
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.delivered = 0
+        self._items: deque[T] = deque()
+        self._cond = Condition()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item: T):
+        """Queue an item, dropping the oldest one if the queue is full."""
+        with self._cond:
+            if self._closed:
+                return
+
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None) -> T | None:
+        """
+        Wait for the next item.
+
+        Returns None if the timeout expires or the queue has been closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._items or self._closed, timeout=timeout
+            ):
+                return None
+
+            if not self._items:
+                return None
+
+            self.delivered += 1
+            return self._items.popleft()
+
+    def close(self):
+        """Wake up any waiting consumer and refuse further items."""
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+
+class FrameMailbox(Generic[T]):
+    """
+    A single-slot mailbox that hands frames to the GTK main loop.
+
+    Posting a frame while an earlier one is still waiting for the main loop
+    simply replaces it, so at most one idle callback is ever scheduled and the
+    UI only ever paints the newest frame. Replaced frames are counted as
+    skipped.
+    """
+
+    skipped: int
+    delivered: int
+
+    def __init__(self, deliver: Callable[[T], None]):
+        """
+        Args:
+            deliver: Called on the main loop with the newest posted frame
+        """
+        self.skipped = 0
+        self.delivered = 0
+        self._deliver = deliver
+        self._lock = Lock()
+        self._pending: T | None = None
+        self._scheduled = False
+
+    def post(self, item: T):
+        """Leave a frame for the main loop, may be called from any thread."""
+        with self._lock:
+            if self._pending is not None:
+                self.skipped += 1
+
+            self._pending = item
+
+            if self._scheduled:
+                return
+
+            self._scheduled = True
+
+        GLib.idle_add(self._flush)
+
+    def clear(self):
+        with self._lock:
+            self._pending = None
+
+    def _flush(self):
+        with self._lock:
+            item = self._pending
+            self._pending = None
+            self._scheduled = False
+
+        if item is not None:
+            self.delivered += 1
+            self._deliver(item)
+
+        return GLib.SOURCE_REMOVE
@@ -72,7 +72,7 @@ class GraphWidget(Gtk.Box):
 class StabilityGraph(GraphWidget):
     """A graph widget for displaying stability over time."""
 
-    lines: list[Line2D] = []
+    lines: list[Line2D]
     auto_capture: AutoCaptureManager
 
     def __init__(
@@ -110,30 +110,24 @@ class StabilityGraph(GraphWidget):
     def update_data(self, *_):
         """Add a new stability data point."""
         stability = self.auto_capture.stability_history
-        if not stability:
-            return
-
-        if len(stability[-1]) != self.auto_capture.stability_duration:
-            log.warning("INVALID data got added")
+        if not len(stability):
             return
 
         self.update_plot()
 
     def update_plot(self):
         """Update the plot with current data."""
-        # Update line data
-        stability_data = self.auto_capture.stability_history
+        # One copy of the (small) history per update. The analysis thread
+        # keeps writing into the ring buffer, and matplotlib < 3.7 holds on
+        # to the arrays it is given until the next draw. Columns of the copy
+        # are then safe zero-copy slices.
+        stability_data = self.auto_capture.stability_history.copy()
+        x = np.arange(len(stability_data))
 
         for series, line in enumerate(self.lines):
-            line.set_data(
-                list(range(len(stability_data))),
-                list([x[series] for x in stability_data]),
-            )
-
-        self.avg.set_data(
-            list(range(len(stability_data))),
-            list([np.mean(x) for x in stability_data]),
-        )
+            line.set_data(x, stability_data[:, series])
+
+        self.avg.set_data(x, stability_data.mean(axis=1))
         # Auto-scale y-axis to ensure line is visible
         self.ax.relim()
         self.ax.autoscale_view()
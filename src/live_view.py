@@ -4,20 +4,26 @@ import gi
 gi.require_version("Gtk", "4.0")
 gi.require_version("Gdk", "4.0")
 
+import functools
 import logging
+import os
 import time
 import traceback
-from threading import Thread
+from threading import Thread, current_thread
 
-import cv2
 import numpy as np
-from gi.repository import GdkPixbuf, GLib, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
 log = logging.getLogger(__name__)
 
 from .camera_core.download import get_current_photo_request
 from .camera_core.err import CameraException, ErrorCode
+from .camera_core.properties import EdsPropertyIDEnum, listeners, results, waiting
 from .common_signal import SignalName
+from .evf_frame import EvfFrame
+from .evf_recording import EvfRecorder, EvfRecording, EvfReplaySource
+from .frame_pacing import CaptureThrottle, FramePacer, is_evf_not_ready
+from .frame_pipeline import FrameMailbox, LatestFrameQueue
 from .shared_state import SharedState
 
 
@@ -27,11 +33,29 @@ class LiveViewState(Enum):
     ShutterDown = auto()
 
 
+# Seconds between live view diagnostics in the debug log
+DIAGNOSTICS_LOG_INTERVAL = 10.0
+
+# Property changes written alongside the frames when recording live view
+RECORDED_PROPERTIES = (
+    EdsPropertyIDEnum.ISOSpeed,
+    EdsPropertyIDEnum.Tv,
+    EdsPropertyIDEnum.Av,
+)
+
+
 class LiveView(Gtk.Frame):
     state: SharedState
     live_view_running = False
     live_view_thread: Thread | None = None
     live_view_state = LiveViewState.Idle
+    pipeline_threads: list[Thread]
+    analysis_queue: LatestFrameQueue[EvfFrame]
+    display_queue: LatestFrameQueue[EvfFrame]
+    display_mailbox: FrameMailbox[Gdk.Texture]
+    evf_source: EvfReplaySource | None = None
+    evf_recorder: EvfRecorder | None = None
+    evf_record_path: str | None = None
 
     def __init__(self, state: SharedState):
         super().__init__()
@@ -58,6 +82,18 @@ class LiveView(Gtk.Frame):
         self.set_child(self.preview_box)
 
         self.state = state
+        self.pacer = FramePacer(target_fps=self.state._settings.live_view_fps)
+        self.state.capture_metrics.add_diagnostics("live_view", self.diagnostics)
+        self._diagnostics_logged = time.monotonic()
+        # Leave the camera to the capture while a picture is being taken
+        self.capture_throttle = CaptureThrottle(self.pacer)
+        self.capture_throttle.attach(self.state)
+        self.pipeline_threads = []
+        self.analysis_queue = LatestFrameQueue("analysis")
+        self.display_queue = LatestFrameQueue("display")
+        self.display_mailbox = FrameMailbox(self._paint_frame)
+        self._setup_evf_recording()
+
         self.state.connect(
             SignalName.LiveViewStopped.name,
             lambda *_: self.stop_live_view(),
@@ -66,13 +102,17 @@ class LiveView(Gtk.Frame):
             SignalName.LiveViewRunning.name,
             lambda *_: self.start_live_view(),
         )
+        # Nothing left to pull frames from, and the recording gets closed
+        self.state.connect(
+            SignalName.CameraDisconnected.name,
+            lambda *_: self.stop_live_view(),
+        )
         self.state.connect(
             SignalName.LiveViewStarting.name,
             lambda *_: self.show_loading(),
         )
 
         self.state_hoc(SignalName.TakePictureError, LiveViewState.Idle)
-        self.state_hoc(SignalName.ImageDownloaded, LiveViewState.Idle)
         self.state_hoc(SignalName.ShutterRelease, LiveViewState.Idle)
         self.state_hoc(SignalName.ShutterDown, LiveViewState.ShutterDown)
         self.state_hoc(SignalName.Focusing, LiveViewState.Focusing)
@@ -100,6 +140,61 @@ class LiveView(Gtk.Frame):
             self.flash_css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
 
+    def _setup_evf_recording(self):
+        """
+        Offline testing hooks, driven by the environment:
+
+        SLIDESCANNER_EVF_RECORD=<file>  append every live view frame to a recording
+        SLIDESCANNER_EVF_REPLAY=<file>  show a recording instead of the camera
+        SLIDESCANNER_EVF_REPLAY_SPEED=max  replay as fast as possible
+        """
+        self.evf_record_path = os.environ.get("SLIDESCANNER_EVF_RECORD")
+        if self.evf_record_path:
+            log.info(f"Recording live view to {self.evf_record_path}")
+            for prop in RECORDED_PROPERTIES:
+                listeners[prop].append(functools.partial(self._record_property, prop))
+
+        replay_path = os.environ.get("SLIDESCANNER_EVF_REPLAY")
+        if replay_path:
+            realtime = os.environ.get("SLIDESCANNER_EVF_REPLAY_SPEED") != "max"
+            log.info(f"Replaying live view from {replay_path} (realtime={realtime})")
+            self.evf_source = EvfReplaySource(
+                EvfRecording(replay_path),
+                realtime=realtime,
+                loop=True,
+                on_property=self._replay_property,
+            )
+            if not realtime:
+                # Let the recording, not the pacer, decide how fast we go
+                self.pacer.target_fps = 0
+
+            GLib.idle_add(self.start_live_view)
+
+    def _record_property(self, prop: EdsPropertyIDEnum):
+        if self.evf_recorder is None or self.state.camera is None:
+            return
+
+        self.evf_recorder.write_property(
+            prop.value, self.state.camera.get_property_value(prop)
+        )
+
+    def _replay_property(self, property_id: int, value: int):
+        """Hand a replayed property change to whoever listens for the camera's."""
+        try:
+            prop = EdsPropertyIDEnum(property_id)
+        except ValueError:
+            log.warning(f"Ignoring replayed change of unknown property {property_id}")
+            return
+
+        results[prop] = value
+        waiting[prop].set()
+        for listener in listeners[prop]:
+            listener()
+
+    def _evf_source(self):
+        """Where live view frames come from, the camera unless replaying."""
+        return self.evf_source or self.state.camera
+
     def state_hoc(self, signal: SignalName, state: LiveViewState):
         def cb(_):
             self.live_view_state = state
@@ -126,27 +221,122 @@ class LiveView(Gtk.Frame):
             return
 
         self.live_view_running = True
+
+        if self.evf_record_path and self.evf_recorder is None:
+            self.evf_recorder = EvfRecorder(self.evf_record_path)
+
+        # Fresh queues each run, the old ones were closed to wake their consumers
+        self.analysis_queue = LatestFrameQueue("analysis")
+        self.display_queue = LatestFrameQueue("display")
+
         self.live_view_thread = Thread(
             target=self.live_view_loop,
             daemon=True,
         )
-        self.live_view_thread.start()
+        self.pipeline_threads = [
+            self.live_view_thread,
+            Thread(target=self.analysis_loop, daemon=True),
+            Thread(target=self.display_loop, daemon=True),
+        ]
+
+        for thread in self.pipeline_threads:
+            thread.start()
+
         self.set_child(self.preview_box)
 
     def stop_live_view(self):
         self.live_view_running = False
         self.on_auto_capture_disabled()
-        if self.live_view_thread is not None:
-            self.live_view_thread.join(timeout=1)
-            self.live_view_thread = None
+
+        # Wake the loop if it is paused for a capture, so it can exit. Shots
+        # still in flight must not throttle the next session either.
+        self.capture_throttle.reset()
+
+        self.analysis_queue.close()
+        self.display_queue.close()
+        self.display_mailbox.clear()
+
+        for thread in self.pipeline_threads:
+            if thread is not current_thread():
+                thread.join(timeout=1)
+
+        self.pipeline_threads = []
+        self.live_view_thread = None
+
+        if self.evf_recorder is not None:
+            self.evf_recorder.close()
+            self.evf_recorder = None
+
+    @property
+    def dropped_frames(self) -> dict[str, int]:
+        """How many frames each downstream stage has skipped to keep up."""
+        return {
+            self.analysis_queue.name: self.analysis_queue.dropped,
+            self.display_queue.name: self.display_queue.dropped,
+            "main_loop": self.display_mailbox.skipped,
+        }
+
+    def diagnostics(self) -> dict:
+        """Live view health, for the metrics export and the debug log."""
+        return {
+            "achieved_fps": round(self.pacer.achieved_fps, 1),
+            "stage_ms": {
+                stage: round(ms, 1) for stage, ms in self.pacer.stage_timings.items()
+            },
+            "dropped_frames": self.dropped_frames,
+        }
+
+    def _log_diagnostics(self):
+        now = time.monotonic()
+        if now - self._diagnostics_logged < DIAGNOSTICS_LOG_INTERVAL:
+            return
+
+        self._diagnostics_logged = now
+        log.debug(f"Live view: {self.diagnostics()}")
 
     def live_view_loop(self):
-        while self.live_view_running and self.state.camera:
+        """Acquisition stage: pull EVF frames off the camera as fast as paced."""
+        while self.live_view_running and (source := self._evf_source()):
+            self.pacer.begin_frame()
             try:
-                data = self.state.camera.download_evf_image()
+                with self.pacer.stage("download"):
+                    frame = EvfFrame(source.download_evf_image())
 
+                if self.evf_recorder is not None:
+                    self.evf_recorder.write_frame(frame.data)
+
+                # Both stages share the frame, whichever gets to it first decodes
+                self.analysis_queue.put(frame)
+                self.display_queue.put(frame)
+
+                self.pacer.frame_done()
+            except CameraException as e:
+                if is_evf_not_ready(e):
+                    self.pacer.not_ready()
+                elif e.err_code == ErrorCode.InvalidHandle:
+                    self.stop_live_view()
+
+            except Exception as e:
+                traceback.print_exception(e)
+                log.error(f"Live view error: {e}")
+                time.sleep(1)
+
+            self._log_diagnostics()
+            self.pacer.wait()
+
+    def analysis_loop(self):
+        """Analysis stage: run auto-capture detection on the newest frame."""
+        while self.live_view_running:
+            frame = self.analysis_queue.get(timeout=0.5)
+            if frame is None:
+                continue
+
+            try:
                 # Process for auto-capture if enabled
-                should_capture = self.state.auto_capture_manager.process_frame(data)
+                with self.pacer.stage("analysis"):
+                    should_capture = self.state.auto_capture_manager.process_frame(
+                        frame
+                    )
 
                 if (
                     self.state.auto_capture_manager.enabled
@@ -154,83 +344,73 @@ class LiveView(Gtk.Frame):
                     and get_current_photo_request() is None
                 ):
                     self._trigger_capture()
-
-                GLib.idle_add(self.update_live_view_image, data)
-            except CameraException as e:
-                if e.err_code == ErrorCode.InvalidHandle:
-                    self.stop_live_view()
-
             except Exception as e:
                 traceback.print_exception(e)
-                log.error(f"Live view error: {e}")
-                time.sleep(1)
-            time.sleep(0.1)
+                log.error(f"Auto-capture analysis error: {e}")
+
+    def display_loop(self):
+        """
+        Display sink: decode the newest frame (and draw the zebra overlay) off
+        the main thread, then hand the finished texture to the GTK main loop.
+        The mailbox coalesces textures the main loop has not got round to yet,
+        so at most one paint is ever pending.
+        """
+        while self.live_view_running:
+            frame = self.display_queue.get(timeout=0.5)
+            if frame is None:
+                continue
+
+            with self.pacer.stage("decode"):
+                texture = self.decode_live_view_image(frame)
+
+            if texture is not None:
+                self.display_mailbox.post(texture)
+
+    def _paint_frame(self, texture: Gdk.Texture):
+        with self.pacer.stage("paint"):
+            self.live_view_image.set_paintable(texture)
 
     def _trigger_capture(self):
         """Trigger an automatic capture using the same logic as manual capture."""
         log.info("Auto-capture: Triggering automatic photo capture")
         self.state.emit(SignalName.TakePicture.name)
 
-    def update_live_view_image(self, data):
+    def decode_live_view_image(self, frame: EvfFrame) -> Gdk.Texture | None:
+        """Turn an EVF frame into a texture, safe to call off the main thread."""
         try:
-            loader = GdkPixbuf.PixbufLoader()
-            loader.write(data)
-            loader.close()
-            pixbuf = loader.get_pixbuf()
+            rgb = frame.rgb
 
-            if pixbuf:
+            if rgb.size:
                 # Highlight pure white pixels with red to show clipping
                 if self.state.show_zebra:
-                    pixbuf = self._highlight_clipped_pixels(pixbuf)
-
-                self.live_view_image.set_pixbuf(pixbuf)
+                    rgb = self._highlight_clipped_pixels(rgb)
+
+                height, width, channels = rgb.shape
+                return Gdk.MemoryTexture.new(
+                    width,
+                    height,
+                    Gdk.MemoryFormat.R8G8B8,
+                    GLib.Bytes.new(rgb.tobytes()),
+                    width * channels,
+                )
             else:
-                log.warning("Pixbuf is None")
+                log.warning("Could not decode EVF frame")
         except Exception as e:
             log.exception(e)
             log.error(f"Failed to load image: {e}")
 
-    def _highlight_clipped_pixels(self, pixbuf: GdkPixbuf.Pixbuf):
-        """Create a new pixbuf with pure white pixels highlighted in red."""
-        # --- 1. PIXBUF TO NUMPY (OPENCV COMPATIBLE) ---
-
-        width = pixbuf.get_width()
-        height = pixbuf.get_height()
-        channels = pixbuf.get_n_channels()
-        rowstride = pixbuf.get_rowstride()
-
-        # Get pixels and create a mutable copy
-        raw_data = pixbuf.get_pixels()
-        # We use np.frombuffer + .copy() to solve the read-only error
-        arr = np.frombuffer(raw_data, dtype=np.uint8).copy()
-        # Reshape and handle rowstride (strips padding bytes if they exist)
-        arr = arr.reshape((height, rowstride))
-        img_rgb = arr[:, : width * channels].reshape((height, width, channels))
-
-        # Convert RGB (GDK) to BGR (OpenCV)
-        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-
-        # Define "pure white" in BGR
-        # We can use cv2.inRange for speed if we ever want to do a "range" (e.g. 250-255)
-        lower_white = np.array([255, 255, 255])
-        upper_white = np.array([255, 255, 255])
-        mask = cv2.inRange(img_bgr, lower_white, upper_white)
-        img_bgr[mask > 0] = [0, 0, 255]
-
-        # Convert back to RGB for GTK
-        processed_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-        data_bytes = processed_rgb.tobytes()
-
-        return GdkPixbuf.Pixbuf.new_from_data(
-            data_bytes,  # type: ignore
-            GdkPixbuf.Colorspace.RGB,
-            pixbuf.get_has_alpha(),
-            8,
-            width,
-            height,
-            width * channels,  # New rowstride (no padding needed here)
-            destroy_fn=None,
-        )
+        return None
+
+    def _highlight_clipped_pixels(self, rgb: np.ndarray) -> np.ndarray:
+        """Return a copy of the image with pure white pixels highlighted in red."""
+        # The decoded frame is shared with auto-capture, never paint on it directly
+        mask = np.all(rgb == 255, axis=2)
+        if not mask.any():
+            return rgb
+
+        highlighted = rgb.copy()
+        highlighted[mask] = [255, 0, 0]
+        return highlighted
 
     def update_focusing_style(self):
         """Update CSS styling based on focusing state."""
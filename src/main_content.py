@@ -1,9 +1,8 @@
 import gi
 
-
 gi.require_version("Gtk", "4.0")
 
-from gi.repository import Gtk
+from gi.repository import GLib, Gtk
 
 from src.constants import INNER_PADDING
 
@@ -102,4 +101,34 @@ class MainContent(Gtk.Box):
         status_label = Gtk.Label(label="Ready")
         status_bar.append(status_label)
 
+        # Capture latency percentiles, updated after every shot. Shots finish
+        # on the camera thread, so hop over to the main loop to touch the label
+        self.state.capture_metrics.connect(
+            "notify::summary",
+            lambda metrics, _: GLib.idle_add(status_label.set_label, metrics.summary),
+        )
+
+        # Transfer of the image currently coming off the camera
+        download_bar = Gtk.ProgressBar(show_text=True, text="")
+        download_bar.set_hexpand(True)
+        download_bar.set_valign(Gtk.Align.CENTER)
+        download_bar.set_margin_start(INNER_PADDING)
+        status_bar.append(download_bar)
+
+        def update_download_bar(state):
+            download_bar.set_fraction(state.download_progress)
+            if not state.download_progress:
+                download_bar.set_text("")
+                return
+
+            download_bar.set_text(
+                f"Download {state.download_progress:.0%} "
+                f"at {state.download_speed:.1f} MB/s"
+            )
+
+        self.state.connect(
+            "notify::download-progress",
+            lambda state, _: GLib.idle_add(update_download_bar, state),
+        )
+
         return status_bar
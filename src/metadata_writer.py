@@ -0,0 +1,161 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from queue import Queue
+from threading import Condition, Thread
+
+from .exif_utils import RAW_FORMATS, add_metadata_to_image, tag_raw_file
+from .exiftool import ExifToolError
+from .picture import CaptureContext
+
+log = logging.getLogger(__name__)
+
+# Failures worth another attempt: the file being busy, a full disk, exiftool
+# restarting. Anything else comes from the image itself and would fail again.
+TRANSIENT_ERRORS = (OSError, ExifToolError)
+
+
+@dataclass(slots=True)
+class TagJob:
+    filepath: str
+    image_format: int
+    context: CaptureContext
+
+
+class MetadataWriterPool:
+    """
+    Tags images that are already on disk, on a small pool of worker threads.
+
+    Downloads write the untouched camera bytes first and then queue the file
+    here, so neither the download nor the camera ever waits on a Pillow
+    re-encode or an exiftool run. The queue is bounded: when tagging falls
+    that far behind, `submit` blocks the download thread rather than letting
+    work pile up without limit. Jobs that failed for a transient reason are
+    retried with a growing delay.
+    """
+
+    workers: int
+    retries: int
+    retry_delay: float
+    completed: int
+    failed: int
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 32,
+        retries: int = 2,
+        retry_delay: float = 0.5,
+    ):
+        """
+        Args:
+            workers: Number of tagging threads
+            max_queue: Jobs that may wait before `submit` blocks
+            retries: Extra attempts for a job that raised a transient error
+            retry_delay: Delay before the first retry, doubled for each one after
+        """
+        self.workers = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.completed = 0
+        self.failed = 0
+
+        self._queue: Queue[TagJob] = Queue(maxsize=max_queue)
+        self._pending = 0
+        self._pending_changed = Condition()
+        self._threads: list[Thread] = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting or being worked on."""
+        with self._pending_changed:
+            return self._pending
+
+    def submit(self, filepath: str, image_format: int, context: CaptureContext):
+        self._ensure_workers()
+
+        with self._pending_changed:
+            self._pending += 1
+
+        self._queue.put(TagJob(filepath, image_format, context))
+
+        depth = self.queue_depth
+        if depth > self.workers:
+            log.debug(f"Metadata queue is {depth} deep")
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait for every submitted job to finish, True if they all did."""
+        with self._pending_changed:
+            return self._pending_changed.wait_for(lambda: self._pending == 0, timeout)
+
+    def _ensure_workers(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+        while len(self._threads) < self.workers:
+            thread = Thread(
+                target=self._worker,
+                name=f"metadata-writer-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+
+            try:
+                self._run(job)
+            finally:
+                with self._pending_changed:
+                    self._pending -= 1
+                    self._pending_changed.notify_all()
+
+    def _run(self, job: TagJob):
+        for attempt in range(self.retries + 1):
+            try:
+                self.tag_file(job)
+                self.completed += 1
+                return
+            except Exception as e:
+                if attempt == self.retries or not isinstance(e, TRANSIENT_ERRORS):
+                    log.error(f"Giving up on tagging {job.filepath}: {e}")
+                    self.failed += 1
+                    return
+
+                delay = self.retry_delay * 2**attempt
+                log.warning(f"Tagging {job.filepath} failed ({e}), retry in {delay}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def tag_file(job: TagJob):
+        # RAW files are tagged in place or through a sidecar, from the path
+        # alone. Reading a 30-50 MB RAW just to hand it back would undo the
+        # point of downloading straight to disk.
+        if job.image_format in RAW_FORMATS:
+            tag_raw_file(job.filepath, job.context, job.image_format)
+            log.debug(f"Metadata added to {job.filepath}")
+            return
+
+        with open(job.filepath, "rb") as f:
+            data = f.read()
+
+        tagged = add_metadata_to_image(
+            data, job.context, job.image_format, job.filepath
+        )
+        if tagged is data:
+            return
+
+        # Never leave a half written image behind
+        partial = f"{job.filepath}.tagging"
+        try:
+            with open(partial, "wb") as f:
+                f.write(tagged)
+            os.replace(partial, job.filepath)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+        log.debug(f"Metadata added to {job.filepath}")
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 
 from gi.repository.GObject import GObject, Property, TYPE_PYOBJECT
@@ -17,6 +18,8 @@ class CassetteItem(GObject):
     _slide_date_err: str = ""
     _slide_date_backing: str = ""
 
+    _rating: int = 0
+
     @Property(type=str)
     def name(self):
         return self._name
@@ -60,3 +63,39 @@ class CassetteItem(GObject):
         self._slide_date_backing = value
         self._slide_date, err = parse_fuzzy_date(value)
         self._slide_date_err = err or ""
+
+    @Property(type=int, default=0)
+    def rating(self):
+        """Star rating 1-5, 0 when the slide is unrated."""
+        return self._rating
+
+    @rating.setter
+    def rating(self, value: int):
+        self._rating = value
+
+
+@dataclass(frozen=True, slots=True)
+class CaptureContext:
+    """
+    What a shot gets tagged with, frozen at the moment the shutter is pressed.
+
+    CassetteItem is the live, editable form state. A shot may still be
+    downloading long after the form has moved on, so every shot carries its
+    own copy of the form instead.
+    """
+
+    name: str = ""
+    label: str = ""
+    date: datetime | None = None
+    slide_date: datetime | None = None
+    rating: int = 0
+
+    @classmethod
+    def from_cassette(cls, item: CassetteItem) -> "CaptureContext":
+        return cls(
+            name=item.name,
+            label=item.label,
+            date=item.date,
+            slide_date=item.slide_date,
+            rating=item.rating,
+        )
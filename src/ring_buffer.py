@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    A fixed-capacity ring buffer of equally shaped NumPy rows.
+
+    Every row is written twice, `capacity` rows apart, so the most recent rows
+    are always one contiguous slice of the backing array. That makes appends
+    O(1) and lets `view()` hand out an ordered, zero-copy window without ever
+    shuffling the data around.
+    """
+
+    capacity: int
+
+    def __init__(
+        self,
+        capacity: int,
+        row_shape: tuple[int, ...] = (),
+        dtype: np.dtype | type = np.float32,
+    ):
+        """
+        Args:
+            capacity: Maximum number of rows kept, older rows are overwritten
+            row_shape: Shape of a single row, () for a buffer of scalars
+            dtype: Element type of the backing array
+        """
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, *row_shape), dtype=dtype)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.capacity
+
+    def append(self, row):
+        self._data[self._next] = row
+        self._data[self._next + self.capacity] = row
+
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def view(self, last: int | None = None) -> np.ndarray:
+        """
+        Ordered (oldest first) read-only window over the stored rows.
+
+        Args:
+            last: Only include this many of the most recent rows
+
+        The returned array aliases the buffer, copy it if it needs to outlive
+        the next `append`.
+        """
+        count = self._count if last is None else min(last, self._count)
+        end = self._next + self.capacity if self.full else self._next
+        window = self._data[end - count : end]
+        window.flags.writeable = False
+        return window
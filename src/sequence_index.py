@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import tempfile
+from threading import Lock
+
+log = logging.getLogger(__name__)
+
+# Kept next to the images of each cassette
+INDEX_FILE = ".slidescanner_index.json"
+
+
+class SequenceAllocator:
+    """
+    Hands out the sequence numbers of the images in a cassette directory.
+
+    Each directory keeps its next number in a small index file, so numbering
+    carries on across restarts without ever listing the directory. The counter
+    is read once per directory, after that an allocation is an increment and
+    an atomic rewrite of the index. Allocations are serialised per directory,
+    so concurrent downloads never get the same number.
+    """
+
+    def __init__(self):
+        self._next: dict[str, int] = {}
+        self._locks: dict[str, Lock] = {}
+        self._locks_lock = Lock()
+
+    def allocate(self, directory: str, name: str, extension: str) -> str:
+        """
+        Reserve the next `name_NNN.ext` in `directory` and return its path.
+        """
+        with self._lock_for(directory):
+            sequence = self._next.get(directory)
+            if sequence is None:
+                sequence = self._load(directory)
+
+            # The index can fall behind, e.g. when it was deleted or the
+            # directory copied without it, so never hand out an existing name
+            while os.path.exists(
+                path := self._path(directory, name, sequence, extension)
+            ):
+                sequence += 1
+
+            self._next[directory] = sequence + 1
+            self._save(directory, sequence + 1)
+
+        return path
+
+    def _lock_for(self, directory: str) -> Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(directory, Lock())
+
+    @staticmethod
+    def _path(directory: str, name: str, sequence: int, extension: str) -> str:
+        return os.path.join(directory, f"{name}_{sequence:03d}{extension}")
+
+    @staticmethod
+    def _load(directory: str) -> int:
+        try:
+            with open(os.path.join(directory, INDEX_FILE)) as f:
+                return int(json.load(f)["next_sequence"])
+        except FileNotFoundError:
+            return 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"Ignoring unreadable sequence index in {directory}: {e}")
+            return 1
+
+    @staticmethod
+    def _save(directory: str, next_sequence: int):
+        fd, partial = tempfile.mkstemp(dir=directory, prefix=f"{INDEX_FILE}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"next_sequence": next_sequence}, f)
+            os.replace(partial, os.path.join(directory, INDEX_FILE))
+        except BaseException:
+            os.remove(partial)
+            raise
@@ -1,34 +1,92 @@
 import json
+import logging
+import os
+import tempfile
+from functools import cache
 from pathlib import Path
+from threading import Lock
+from typing import Callable
 
 from gi.repository import Gtk, GLib, Pango
 
+log = logging.getLogger(__name__)
+
+# What config.json holds, and all that `Settings.update` may change
+PERSISTED_SETTINGS = ("photo_location", "live_view_fps")
+
 
 class Settings:
+    """
+    The user's settings, backed by config.json in the cache directory.
+
+    There is one instance per process, see `get_settings`, so reading a
+    setting never touches the disk. Changes go through `update`, which writes
+    the file back and then tells the subscribers.
+    """
+
     cache_dir: Path
     config_file: Path
     photo_location: str
+    live_view_fps: float
 
     def __init__(self):
         self.cache_dir = Path.home() / ".cache" / "slidescanner"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.config_file = self.cache_dir / "config.json"
         self.photo_location = str(Path.home() / "Pictures")
+        self.live_view_fps = 30.0
+
+        self._subscribers: list[Callable[["Settings"], None]] = []
+        self._lock = Lock()
         self.load()
 
     def load(self):
         if self.config_file.exists():
             with open(self.config_file, "r") as f:
                 data = json.load(f)
-                self.photo_location = data.get("photo_location", self.photo_location)
+
+            for name in PERSISTED_SETTINGS:
+                setattr(self, name, data.get(name, getattr(self, name)))
 
     def save(self):
-        data = {
-            "photo_location": self.photo_location,
-        }
+        data = {name: getattr(self, name) for name in PERSISTED_SETTINGS}
+
+        # Write next to the config and rename over it, a crash mid-write
+        # never leaves a truncated config behind
+        fd, partial = tempfile.mkstemp(dir=self.cache_dir, prefix="config.json.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=4)
+            os.replace(partial, self.config_file)
+        except BaseException:
+            os.remove(partial)
+            raise
 
-        with open(self.config_file, "w") as f:
-            json.dump(data, f, indent=4)
+    def subscribe(self, callback: Callable[["Settings"], None]):
+        """Call `callback` with the settings after every `update`."""
+        self._subscribers.append(callback)
+
+    def update(self, **values):
+        """Change some settings, save them and notify the subscribers."""
+        for name in values:
+            if name not in PERSISTED_SETTINGS:
+                raise AttributeError(f"Unknown setting {name!r}")
+
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, value)
+
+            self.save()
+
+        log.info(f"Settings updated: {', '.join(values)}")
+        for callback in self._subscribers:
+            callback(self)
+
+
+@cache
+def get_settings() -> Settings:
+    """The process wide settings, loaded on first use."""
+    return Settings()
 
 
 class SettingsDialog(Gtk.Window):
@@ -36,10 +94,9 @@ class SettingsDialog(Gtk.Window):
         super().__init__(title="Settings", transient_for=parent, modal=True)
         self.set_default_size(500, 300)
         self.shared_state = shared_state
-        self.settings = Settings()
-
-        # Apply current settings
-        self.shared_state.photo_location = self.settings.photo_location
+        self.settings = get_settings()
+        # Only applied on save
+        self.photo_location = self.settings.photo_location
 
         # Build UI
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -57,7 +114,7 @@ class SettingsDialog(Gtk.Window):
         loc_box.append(loc_label)
 
         current_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=30)
-        self.loc_label = Gtk.Label(label=self.settings.photo_location)
+        self.loc_label = Gtk.Label(label=self.photo_location)
         self.loc_label.set_ellipsize(Pango.EllipsizeMode.START)
         self.loc_label.set_hexpand(True)
         self.loc_label.set_xalign(0.5)
@@ -96,14 +153,13 @@ class SettingsDialog(Gtk.Window):
             folder = dialog.select_folder_finish(result)
             if folder:
                 path = folder.get_path()
-                self.settings.photo_location = path
+                self.photo_location = path
                 self.loc_label.set_text(path)
         except GLib.Error:
             pass
 
     def on_save(self, btn):
-        self.shared_state.photo_location = self.settings.photo_location
-        self.settings.save()
+        self.settings.update(photo_location=self.photo_location)
         self.close()
 
     def on_cancel(self, btn):
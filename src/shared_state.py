@@ -2,12 +2,9 @@ import logging
 from threading import Thread
 import gi
 
-
 gi.require_version("Gtk", "4.0")
 gi.require_version("Gdk", "4.0")
 
-import pathlib
-
 log = logging.getLogger(__name__)
 
 from gi.repository import GObject
@@ -17,34 +14,48 @@ from src.camera_core import CameraManager, EdsCameraRef
 from .camera import Camera
 from .camera_core import EdsPropertyIDEnum
 from .camera_core.properties import battery_level_to_percentage
+from .camera_core.download import (
+    DownloadProgress,
+    download_progress_listeners,
+    file_written_listeners,
+)
 from .camera_core.err import CameraException
+from .capture_metrics import CaptureMetrics
 from .picture import CassetteItem
-from .settings import Settings
-from .common_signal import SignalName
+from .settings import Settings, get_settings
+from .common_signal import SignalName, signal_definitions
 from .auto_capture import AutoCaptureManager
 
 
 class SharedState(GObject.GObject):
     """Shared state manager with GTK signals for application-wide communication."""
 
-    _settings: Settings = Settings()
+    _settings: Settings = get_settings()
     _camera: Camera | None = None
     _battery_level: int | None = None  # Battery level 0-100 or None
     _show_zebra: bool = True
+    _download_progress: float = 0.0  # Fraction of the current transfer, 0-1
+    _download_speed: float = 0.0  # MB/s of the current transfer
 
     cassette = CassetteItem()
     auto_capture_manager = AutoCaptureManager()
+    capture_metrics = CaptureMetrics()
 
-    __gsignals__ = {
-        sig.name: (GObject.SignalFlags.RUN_FIRST, None, ()) for sig in SignalName
-    }
+    __gsignals__ = signal_definitions()
 
     def __init__(self):
         super().__init__()
         self.camera_manager = CameraManager(self)
-        self.photo_location = str(pathlib.Path.home() / "Pictures")
+        self.photo_location = self._settings.photo_location
+        self._settings.subscribe(self.on_settings_changed)
 
         self.connect(SignalName.CameraConnected.name, self.on_camera_connected)
+        self.connect(SignalName.ImageDownloaded.name, self.on_download_finished)
+        self.connect(SignalName.ImageDownloadFailed.name, self.on_download_finished)
+
+        self.capture_metrics.attach(self)
+        file_written_listeners.append(self.capture_metrics.file_written)
+        download_progress_listeners.append(self.on_download_progress)
 
     @GObject.Property(type=int)
     def battery_level(self):
@@ -74,6 +85,35 @@ class SharedState(GObject.GObject):
     def show_zebra(self, val):
         self._show_zebra = val
 
+    @GObject.Property(type=float)
+    def download_progress(self):
+        return self._download_progress
+
+    @download_progress.setter
+    def download_progress(self, fraction):
+        self._download_progress = fraction
+
+    @GObject.Property(type=float)
+    def download_speed(self):
+        return self._download_speed
+
+    @download_speed.setter
+    def download_speed(self, mb_per_second):
+        self._download_speed = mb_per_second
+
+    def on_download_progress(self, progress: DownloadProgress):
+        # Speed first, so anything watching the progress sees a matching speed
+        self.download_speed = progress.mb_per_second
+        self.download_progress = progress.fraction
+
+    def on_download_finished(self, *_):
+        # Whether it made it or not, nothing is transferring any more
+        self.download_speed = 0.0
+        self.download_progress = 0.0
+
+    def on_settings_changed(self, settings: Settings):
+        self.photo_location = settings.photo_location
+
     def on_camera_connected(self, *_):
         log.info("A camera has connected to us!")
 
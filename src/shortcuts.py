@@ -1,7 +1,7 @@
+import datetime
 import gi
 import logging
 
-
 gi.require_version("Gtk", "4.0")
 
 from threading import Thread
@@ -29,6 +29,7 @@ class ShortcutsHandler:
             "s": self.open_settings,  # Ctrl+S
             "q": self.quit_application,  # Ctrl+Q
             "n": self.next_cassette,  # Ctrl+N
+            "e": self.export_capture_metrics,  # Ctrl+E
         }
 
     def on_key_pressed(self, controller, keyval, keycode, state):
@@ -63,6 +64,12 @@ class ShortcutsHandler:
         log.debug("Next cassette shortcut triggered")
         self.state.next_cassette()
 
+    def export_capture_metrics(self):
+        """Handle Ctrl+E: Export this session's capture timings as JSON."""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = self.state._settings.cache_dir / f"capture_metrics_{timestamp}.json"
+        self.state.capture_metrics.export_json(str(path))
+
     def show_shortcuts_dialog(self):
         """Display a dialog showing all available keyboard shortcuts."""
         # Dynamically generate shortcuts text from the shortcuts dictionary
@@ -71,6 +78,7 @@ class ShortcutsHandler:
             "s": "Open Settings",
             "q": "Quit Application",
             "n": "Next Cassette",
+            "e": "Export Capture Timings",
         }
 
         shortcuts_lines = ["Available Keyboard Shortcuts:"]
@@ -0,0 +1,230 @@
+import functools
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from .evf_frame import THUMBNAIL_SIZE, EvfFrame
+
+
+@functools.lru_cache(maxsize=4)
+def hanning_window(height: int, width: int) -> np.ndarray:
+    """2D Hanning window for an analysis resolution, built once and reused."""
+    window = (
+        np.hanning(height)[:, np.newaxis] * np.hanning(width)[np.newaxis, :]
+    ).astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+class StabilityDetector(ABC):
+    """
+    Decides how similar a live view frame is to the frames before it.
+
+    A detector reduces every frame to a fixed-shape feature array once, and
+    then scores a new frame against a whole stack of prior features in one
+    go. Scores are similarities in [0, 1], higher meaning more alike, and are
+    compared against `default_threshold` unless the caller overrides it.
+    """
+
+    name: str = "base"
+    default_threshold: float = 0.95
+    feature_shape: tuple[int, ...] = ()
+    feature_dtype: type = np.float32
+
+    @abstractmethod
+    def features(self, frame: EvfFrame) -> np.ndarray | None:
+        """
+        Reduce a frame to its feature array, None if the frame is undecodable.
+
+        The result may live in a workspace the next call overwrites, copy it
+        if it needs to be kept.
+        """
+
+    @abstractmethod
+    def similarity(
+        self, priors: np.ndarray, features: np.ndarray, out: np.ndarray
+    ) -> np.ndarray:
+        """
+        Score `features` against every row of `priors`, writing into `out`.
+
+        Args:
+            priors: (n, *feature_shape) stack of earlier features
+            features: Features of the new frame
+            out: (n,) float32 array receiving the similarities
+
+        Returns:
+            `out`
+        """
+
+
+class CorrelationDetector(StabilityDetector):
+    """
+    Pearson correlation of Hanning windowed thumbnails.
+
+    Features are the windowed thumbnail, flattened, centred and normalised to
+    unit length, so correlation against every prior is one matrix-vector
+    product.
+    """
+
+    name = "correlation"
+    default_threshold = 0.95
+    feature_shape = (THUMBNAIL_SIZE * THUMBNAIL_SIZE,)
+
+    def __init__(self):
+        self._workspace = np.empty((THUMBNAIL_SIZE, THUMBNAIL_SIZE), np.float32)
+
+    def features(self, frame: EvfFrame) -> np.ndarray | None:
+        img = frame.thumbnail
+
+        if img.size == 0:
+            return None
+
+        # Apply Hanning window to reduce edge importance
+        np.multiply(img, hanning_window(*img.shape), out=self._workspace)
+        features = self._workspace.reshape(-1)
+        features -= features.mean()
+
+        # A constant image has no structure to correlate, it is left as the
+        # zero vector which correlates with nothing
+        norm = np.linalg.norm(features)
+        if norm > 0:
+            features /= norm
+
+        return features
+
+    def similarity(
+        self, priors: np.ndarray, features: np.ndarray, out: np.ndarray
+    ) -> np.ndarray:
+        np.matmul(priors, features, out=out)
+        return np.maximum(out, 0.0, out=out)  # Ensure non-negative
+
+
+class MeanAbsDiffDetector(StabilityDetector):
+    """One minus the mean absolute pixel difference between thumbnails."""
+
+    name = "mean-abs-diff"
+    default_threshold = 0.97
+    feature_shape = (THUMBNAIL_SIZE * THUMBNAIL_SIZE,)
+
+    def __init__(self):
+        self._workspace = np.empty(self.feature_shape, np.float32)
+        self._diff = np.empty((0, *self.feature_shape), np.float32)
+
+    def features(self, frame: EvfFrame) -> np.ndarray | None:
+        img = frame.thumbnail
+
+        if img.size == 0:
+            return None
+
+        np.multiply(img.reshape(-1), 1 / 255, out=self._workspace)
+        return self._workspace
+
+    def similarity(
+        self, priors: np.ndarray, features: np.ndarray, out: np.ndarray
+    ) -> np.ndarray:
+        if self._diff.shape != priors.shape:
+            self._diff = np.empty(priors.shape, np.float32)
+
+        np.subtract(priors, features, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        np.mean(self._diff, axis=1, out=out)
+        return np.subtract(1.0, out, out=out)
+
+
+class PhaseCorrelationDetector(StabilityDetector):
+    """
+    Phase correlation, which measures how far the image has shifted.
+
+    The slide feeder mostly moves frames sideways, so a frame only counts as
+    similar if the correlation peak sits within `max_shift` thumbnail pixels
+    of the origin. The score is the peak height, which drops as the content
+    itself changes. Features are the FFT of the windowed thumbnail so each
+    comparison is a single batched inverse FFT.
+    """
+
+    name = "phase-correlation"
+    default_threshold = 0.8
+    feature_shape = (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+    feature_dtype = np.complex64
+
+    max_shift: float
+
+    def __init__(self, max_shift: float = 1.0):
+        self.max_shift = max_shift
+
+    def features(self, frame: EvfFrame) -> np.ndarray | None:
+        img = frame.thumbnail
+
+        if img.size == 0:
+            return None
+
+        # Centre before windowing, otherwise the window's own envelope shows up
+        # as a peak at the origin in every comparison
+        centred = img - img.mean(dtype=np.float32)
+        return np.fft.fft2(centred * hanning_window(*img.shape)).astype(np.complex64)
+
+    def similarity(
+        self, priors: np.ndarray, features: np.ndarray, out: np.ndarray
+    ) -> np.ndarray:
+        cross_power = priors * np.conj(features)
+        cross_power /= np.maximum(np.abs(cross_power), 1e-9)
+        surfaces = np.fft.ifft2(cross_power).real
+
+        n, height, width = surfaces.shape
+        flat = surfaces.reshape(n, -1)
+        peaks = flat.argmax(axis=1)
+
+        # Wrap peak positions into signed shifts around the origin
+        dy, dx = np.unravel_index(peaks, (height, width))
+        dy = np.where(dy > height // 2, dy - height, dy)
+        dx = np.where(dx > width // 2, dx - width, dx)
+        shifted = np.hypot(dy, dx) > self.max_shift
+
+        out[:] = flat[np.arange(n), peaks]
+        out[shifted] = 0.0
+        return np.clip(out, 0.0, 1.0, out=out)
+
+
+class PerceptualHashDetector(StabilityDetector):
+    """
+    Hamming distance between 64 bit DCT perceptual hashes.
+
+    Very cheap to compare, at the cost of only reacting to fairly coarse
+    changes in the image.
+    """
+
+    name = "perceptual-hash"
+    default_threshold = 0.9
+    feature_shape = (64,)
+    feature_dtype = np.uint8
+
+    def features(self, frame: EvfFrame) -> np.ndarray | None:
+        img = frame.thumbnail
+
+        if img.size == 0:
+            return None
+
+        small = cv2.resize(img, (32, 32), interpolation=cv2.INTER_AREA)
+        low_freq = cv2.dct(small.astype(np.float32))[:8, :8].reshape(-1)
+
+        # Ignore the DC term when picking the median, it dwarfs everything else
+        return (low_freq > np.median(low_freq[1:])).astype(np.uint8)
+
+    def similarity(
+        self, priors: np.ndarray, features: np.ndarray, out: np.ndarray
+    ) -> np.ndarray:
+        distance = np.count_nonzero(priors != features, axis=1)
+        np.subtract(1.0, distance / features.size, out=out)
+        return out
+
+
+DETECTORS: dict[str, type[StabilityDetector]] = {
+    detector.name: detector
+    for detector in (
+        CorrelationDetector,
+        MeanAbsDiffDetector,
+        PhaseCorrelationDetector,
+        PerceptualHashDetector,
+    )
+}